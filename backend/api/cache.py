@@ -0,0 +1,117 @@
+import time
+from collections import Counter
+from hashlib import md5
+
+from django.core.cache import cache
+from django.utils.cache import get_conditional_response, patch_vary_headers
+from django.utils.http import http_date, quote_etag
+from rest_framework.response import Response
+
+from api.enums import CacheEnums
+
+VERSION_KEY = '{}:version'
+RESPONSE_KEY = 'responses:{}'
+USER_NAMESPACE = 'user:{}'
+
+
+def get_version(namespace):
+    key = VERSION_KEY.format(namespace)
+    version = cache.get(key)
+    if version is None:
+        cache.add(key, time.time_ns(), timeout=None)
+        version = cache.get(key)
+    return version
+
+
+def bump_version(namespace):
+    version = time.time_ns()
+    cache.set(VERSION_KEY.format(namespace), version, timeout=None)
+    return version
+
+
+stats = Counter()
+
+
+def count(event):
+    stats[event] += 1
+
+
+def get_stats():
+    return {event: stats[event] for event in ('hits', 'misses')}
+
+
+class CachedResponseMixin:
+    cache_namespaces = ()
+    cache_timeout = CacheEnums.RESPONSE_TIMEOUT
+
+    def list(self, request, *args, **kwargs):
+        return self.cached_response(super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.cached_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_cache_key(self, request, kwargs):
+        params = sorted(
+            (key, value)
+            for key, values in request.query_params.lists()
+            for value in values if value != '')
+        versions = [get_version(namespace)
+                    for namespace in self.cache_namespaces]
+        key = repr((self.basename, self.action, sorted(kwargs.items()),
+                    params, versions))
+        return RESPONSE_KEY.format(md5(key.encode()).hexdigest())
+
+    def cached_response(self, handler, request, *args, **kwargs):
+        if not request.user.is_anonymous:
+            return handler(request, *args, **kwargs)
+        key = self.get_cache_key(request, kwargs)
+        data = cache.get(key)
+        if data is not None:
+            count('hits')
+            return Response(data, headers={'X-Cache': 'HIT'})
+        count('misses')
+        response = handler(request, *args, **kwargs)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.cache_timeout)
+        response['X-Cache'] = 'MISS'
+        return response
+
+
+class ConditionalGetMixin:
+    etag_namespaces = ()
+
+    def list(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().list, request, *args, **kwargs)
+
+    def retrieve(self, request, *args, **kwargs):
+        return self.conditional_response(
+            super().retrieve, request, *args, **kwargs)
+
+    def get_etag_state(self, request, kwargs):
+        return tuple(
+            get_version(namespace) for namespace in self.etag_namespaces)
+
+    def get_last_modified(self, request, kwargs):
+        return None
+
+    def conditional_response(self, handler, request, *args, **kwargs):
+        state = (self.get_etag_state(request, kwargs),
+                 request.user.pk, request.get_full_path())
+        etag = quote_etag(md5(repr(state).encode()).hexdigest())
+        last_modified = None
+        if request.user.is_anonymous:
+            last_modified = self.get_last_modified(request, kwargs)
+        if last_modified is not None:
+            last_modified = int(last_modified.timestamp())
+        response = get_conditional_response(
+            request, etag=etag, last_modified=last_modified)
+        if response is None:
+            response = handler(request, *args, **kwargs)
+        if response.status_code in (200, 304):
+            response['ETag'] = etag
+            if last_modified is not None:
+                response['Last-Modified'] = http_date(last_modified)
+            patch_vary_headers(response, ('Authorization',))
+        return response
@@ -0,0 +1,38 @@
+from enum import IntEnum
+
+
+class ShoppingListPdfEnums(IntEnum):
+    TITLE_FONT_SIZE = 24
+    TITLE_X = 200
+    FONT_SIZE = 16
+    LINE_X = 75
+    LINE_HEIGHT = 25
+    TOP = 800
+    TITLE_MARGIN = 50
+    BOTTOM = 50
+    SPOOL_MAX_SIZE = 1024 * 1024
+    CHUNK_SIZE = 64 * 1024
+
+
+class PaginationEnums(IntEnum):
+    PAGE_SIZE = 6
+
+
+class CacheEnums(IntEnum):
+    RESPONSE_TIMEOUT = 60 * 60
+
+
+class BatchEnums(IntEnum):
+    MAX_IDS = 100
+
+
+class ImageEnums(IntEnum):
+    MAX_SIZE = 5 * 1024 * 1024
+    MAX_DIMENSION = 4096
+    DECODE_CHUNK_SIZE = 64 * 1024
+
+
+class PantryEnums(IntEnum):
+    MAX_INGREDIENTS = 200
+    DEFAULT_MIN_COVERAGE = 100
+    SYNC_OVERLAP_SECONDS = 60
@@ -1,31 +1,74 @@
 from django.contrib.auth import get_user_model
+from django.db.models import Exists, OuterRef
 from django_filters.rest_framework import FilterSet, filters
-from rest_framework.filters import SearchFilter
+from rest_framework.filters import BaseFilterBackend
 
+from api.indexes import ingredient_index, tag_index
 from recipes import models
 
 User = get_user_model()
 
 
+ORDERINGS = {
+    'popular': '-popularity',
+    'trending': '-trending',
+}
+
+
+def tag_choices():
+    return [(slug, slug) for slug in tag_index.ids_by_slug()]
+
+
 class RecipeFilter(FilterSet):
-    tags = filters.AllValuesMultipleFilter(field_name='tags__slug')
+    tags = filters.MultipleChoiceFilter(
+        choices=tag_choices, method='filter_tags')
     author = filters.ModelChoiceFilter(queryset=User.objects.all())
+    search = filters.CharFilter(method='filter_search')
     is_favorited = filters.BooleanFilter(method='filter_is_favorited')
     is_in_shopping_cart = filters.BooleanFilter(
         method='filter_is_in_shopping_cart')
+    ordering = filters.ChoiceFilter(
+        choices=[(value, value) for value in ORDERINGS],
+        method='filter_ordering')
+
+    def filter_tags(self, queryset, name, value):
+        if not value:
+            return queryset
+        ids_by_slug = tag_index.ids_by_slug()
+        return queryset.filter(Exists(
+            models.Recipe.tags.through.objects.filter(
+                recipe=OuterRef('pk'),
+                tag__in=[ids_by_slug[slug] for slug in value
+                         if slug in ids_by_slug])))
+
+    def filter_search(self, queryset, name, value):
+        if not value.strip():
+            return queryset
+        return queryset.search(value)
 
     def filter_is_favorited(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(in_favorite__user=self.request.user)
+            return queryset.filter(is_favorited=True)
+        return queryset
 
     def filter_is_in_shopping_cart(self, queryset, name, value):
         if value and not self.request.user.is_anonymous:
-            return queryset.filter(in_carts__user=self.request.user)
+            return queryset.filter(is_in_shopping_cart=True)
+        return queryset
+
+    def filter_ordering(self, queryset, name, value):
+        return queryset.order_by(ORDERINGS[value], 'id')
 
     class Meta:
         model = models.Recipe
         fields = ('author', 'tags')
 
 
-class IngredientFilter(SearchFilter):
+class IngredientFilter(BaseFilterBackend):
     search_param = 'name'
+
+    def filter_queryset(self, request, queryset, view):
+        name = request.query_params.get(self.search_param)
+        if not name or view.action != 'list':
+            return queryset
+        return ingredient_index.search(name)
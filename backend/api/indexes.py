@@ -0,0 +1,80 @@
+import threading
+from bisect import bisect_left
+
+from api import cache
+from recipes.models import Ingredient, Tag
+
+
+class CatalogIndex:
+    model = None
+    namespace = None
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._state = self.build(())
+
+    def build(self, objects):
+        return ({obj.id: obj for obj in objects},)
+
+    def _load(self):
+        version = cache.get_version(self.namespace)
+        if version == self._version:
+            return self._state
+        with self._lock:
+            if version != self._version:
+                self._state = self.build(self.model.objects.all())
+                self._version = version
+            return self._state
+
+    def get_many(self, ids):
+        objects = self._load()[0]
+        missing = [pk for pk in ids if pk not in objects]
+        if missing:
+            found = self.model.objects.in_bulk(missing)
+            if found:
+                self._version = None
+            objects = {**objects, **found}
+        return {pk: objects[pk] for pk in ids if pk in objects}
+
+
+class TagIndex(CatalogIndex):
+    model = Tag
+    namespace = 'tags'
+
+    def build(self, objects):
+        tags = list(objects)
+        return (
+            {tag.id: tag for tag in tags},
+            {tag.slug: tag.id for tag in tags},
+        )
+
+    def ids_by_slug(self):
+        return self._load()[1]
+
+
+class IngredientIndex(CatalogIndex):
+    model = Ingredient
+    namespace = 'ingredients'
+
+    def build(self, objects):
+        ingredients = sorted(
+            objects,
+            key=lambda ingredient: (ingredient.name.casefold(),
+                                    ingredient.id))
+        return (
+            {ingredient.id: ingredient for ingredient in ingredients},
+            tuple(ingredient.name.casefold() for ingredient in ingredients),
+            tuple(ingredients),
+        )
+
+    def search(self, name):
+        _, keys, ingredients = self._load()
+        name = name.casefold()
+        start = bisect_left(keys, name)
+        end = bisect_left(keys, name + chr(0x10FFFF), start)
+        return list(ingredients[start:end])
+
+
+tag_index = TagIndex()
+ingredient_index = IngredientIndex()
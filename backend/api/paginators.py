@@ -1,5 +1,172 @@
-from rest_framework.pagination import PageNumberPagination
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+
+from django.core.exceptions import ValidationError
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Q
+from rest_framework.exceptions import NotFound
+from rest_framework.pagination import BasePagination, PageNumberPagination
+from rest_framework.response import Response
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+from api.enums import PaginationEnums
+
+
+class KeysetPagination(BasePagination):
+    cursor_query_param = 'cursor'
+    page_size_query_param = 'limit'
+    page_size = PaginationEnums.PAGE_SIZE
+    invalid_cursor_message = 'Неверный курсор'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        self.ordering = self.get_ordering(queryset)
+        queryset = queryset.order_by(*self.ordering)
+        self.fields = self.get_fields(queryset)
+        position = self.decode_cursor(request)
+        if position is not None:
+            queryset = queryset.filter(self.get_condition(position))
+        page_size = self.get_page_size(request)
+        page = list(queryset[:page_size + 1])
+        self.has_next = len(page) > page_size
+        self.page = page[:page_size]
+        return self.page
+
+    def get_paginated_response(self, data):
+        return Response({'next': self.get_next_link(), 'results': data})
+
+    def get_page_size(self, request):
+        try:
+            page_size = int(request.query_params[self.page_size_query_param])
+        except (KeyError, ValueError):
+            return self.page_size
+        return page_size if page_size > 0 else self.page_size
+
+    def get_ordering(self, queryset):
+        ordering = tuple(
+            queryset.query.order_by or queryset.model._meta.ordering)
+        if not ordering or ordering[-1].lstrip('-') not in ('pk', 'id'):
+            ordering += ('pk',)
+        return ordering
+
+    def get_fields(self, queryset):
+        opts = queryset.model._meta
+        annotations = queryset.query.annotations
+        fields = []
+        for field in self.ordering:
+            name = field.lstrip('-')
+            if name in annotations:
+                fields.append(annotations[name].output_field)
+            else:
+                fields.append(
+                    opts.pk if name == 'pk' else opts.get_field(name))
+        return fields
+
+    def get_condition(self, position):
+        condition, equal = Q(), Q()
+        for field, value in zip(self.ordering, position):
+            name = field.lstrip('-')
+            lookup = 'lt' if field.startswith('-') else 'gt'
+            condition |= equal & Q(**{f'{name}__{lookup}': value})
+            equal &= Q(**{name: value})
+        return condition
+
+    def decode_cursor(self, request):
+        cursor = request.query_params.get(self.cursor_query_param)
+        if not cursor:
+            return None
+        try:
+            position = json.loads(urlsafe_b64decode(cursor.encode()))
+        except ValueError:
+            raise NotFound(self.invalid_cursor_message)
+        if (not isinstance(position, list)
+                or len(position) != len(self.ordering)
+                or not all(isinstance(value, (str, int, float))
+                           for value in position)):
+            raise NotFound(self.invalid_cursor_message)
+        try:
+            return [field.to_python(value)
+                    for field, value in zip(self.fields, position)]
+        except (TypeError, ValueError, ValidationError):
+            raise NotFound(self.invalid_cursor_message)
+
+    def encode_cursor(self, instance):
+        position = [getattr(instance, field.lstrip('-'))
+                    for field in self.ordering]
+        return urlsafe_b64encode(
+            json.dumps(position, cls=DjangoJSONEncoder).encode()).decode()
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.cursor_query_param,
+            self.encode_cursor(self.page[-1]))
+
+
+class CountlessPagePagination(PageNumberPagination):
+    page_size_query_param = 'limit'
+    page_size = PaginationEnums.PAGE_SIZE
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.request = request
+        try:
+            self.number = int(
+                request.query_params.get(self.page_query_param, 1))
+        except ValueError:
+            self.number = 0
+        if self.number < 1:
+            raise NotFound(self.invalid_page_message.format(
+                page_number=self.number, message=''))
+        page_size = self.get_page_size(request)
+        offset = (self.number - 1) * page_size
+        page = list(queryset[offset:offset + page_size + 1])
+        self.has_next = len(page) > page_size
+        return page[:page_size]
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_next_link(self):
+        if not self.has_next:
+            return None
+        return replace_query_param(
+            self.request.build_absolute_uri(), self.page_query_param,
+            self.number + 1)
+
+    def get_previous_link(self):
+        if self.number == 1:
+            return None
+        url = self.request.build_absolute_uri()
+        if self.number == 2:
+            return remove_query_param(url, self.page_query_param)
+        return replace_query_param(
+            url, self.page_query_param, self.number - 1)
 
 
 class LimitedPagePagination(PageNumberPagination):
     page_size_query_param = 'limit'
+    mode_query_param = 'pagination'
+    modes = {
+        'cursor': KeysetPagination,
+        'nocount': CountlessPagePagination,
+    }
+    delegate = None
+
+    def paginate_queryset(self, queryset, request, view=None):
+        mode = self.modes.get(request.query_params.get(self.mode_query_param))
+        if mode is KeysetPagination and isinstance(queryset, list):
+            mode = None
+        if mode is None:
+            return super().paginate_queryset(queryset, request, view)
+        self.delegate = mode()
+        return self.delegate.paginate_queryset(queryset, request, view)
+
+    def get_paginated_response(self, data):
+        if self.delegate is not None:
+            return self.delegate.get_paginated_response(data)
+        return super().get_paginated_response(data)
@@ -0,0 +1,117 @@
+import threading
+from datetime import timedelta
+
+import numpy as np
+from django.utils import timezone
+
+from api import cache
+from api.enums import PantryEnums
+from recipes.models import AmountIngredient, Recipe
+
+POPCOUNT = np.array([bin(byte).count('1') for byte in range(256)], np.uint8)
+
+
+class PantryIndex:
+    namespace = 'recipes'
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._synced_at = None
+        self._state = (np.zeros(0, np.int64), {},
+                       np.zeros((0, 0), np.uint8), np.zeros(0, np.int32))
+
+    @staticmethod
+    def fetch(amounts):
+        return np.array(
+            list(amounts.values_list('recipe_id', 'ingredient_id')
+                 .order_by().iterator()),
+            np.int64).reshape(-1, 2)
+
+    @staticmethod
+    def apply(state, dropped_ids, pairs):
+        recipe_ids, columns, bits, sizes = state
+        columns = dict(columns)
+        for ingredient_id in np.unique(pairs[:, 1]).tolist():
+            columns.setdefault(ingredient_id, len(columns))
+        width = (len(columns) + 7) // 8
+        if width > bits.shape[1]:
+            bits = np.pad(bits, ((0, 0), (0, width - bits.shape[1])))
+        new_ids, rows = np.unique(pairs[:, 0], return_inverse=True)
+        keep = ~np.isin(recipe_ids, np.union1d(dropped_ids, new_ids))
+        known = np.fromiter(columns, np.int64, len(columns))
+        order = np.argsort(known)
+        cols = np.fromiter(columns.values(), np.int64, len(columns))[
+            order[np.searchsorted(known[order], pairs[:, 1])]]
+        new_bits = np.zeros((len(new_ids), width), np.uint8)
+        np.bitwise_or.at(
+            new_bits, (rows, cols >> 3),
+            np.uint8(0x80) >> (cols & 7).astype(np.uint8))
+        return (
+            np.concatenate((recipe_ids[keep], new_ids)),
+            columns,
+            np.concatenate((bits[keep], new_bits)),
+            np.concatenate((
+                sizes[keep],
+                POPCOUNT[new_bits].sum(axis=1, dtype=np.int32))),
+        )
+
+    def _sync(self, state):
+        started = timezone.now()
+        if self._synced_at is None:
+            state = self.apply(
+                state, np.zeros(0, np.int64),
+                self.fetch(AmountIngredient.objects.all()))
+        else:
+            since = self._synced_at - timedelta(
+                seconds=PantryEnums.SYNC_OVERLAP_SECONDS)
+            changed = np.array(
+                Recipe.objects.filter(updated__gte=since).order_by()
+                .values_list('id', flat=True), np.int64)
+            existing = np.array(
+                Recipe.objects.order_by().values_list('id', flat=True),
+                np.int64)
+            state = self.apply(
+                state,
+                np.union1d(np.setdiff1d(state[0], existing), changed),
+                self.fetch(AmountIngredient.objects.filter(
+                    recipe_id__in=changed.tolist())))
+        self._synced_at = started
+        return state
+
+    def _load(self):
+        version = cache.get_version(self.namespace)
+        if version == self._version:
+            return self._state
+        with self._lock:
+            if version != self._version:
+                self._state = self._sync(self._state)
+                self._version = version
+            return self._state
+
+    def match(self, ingredients, min_coverage, max_missing=None):
+        recipe_ids, columns, bits, sizes = self._load()
+        cols = np.array(
+            sorted({columns[pk] for pk in ingredients if pk in columns}),
+            np.int64)
+        query = np.zeros(bits.shape[1], np.uint8)
+        np.bitwise_or.at(
+            query, cols >> 3, np.uint8(0x80) >> (cols & 7).astype(np.uint8))
+        words = np.flatnonzero(query)
+        matched = POPCOUNT[bits[:, words] & query[words]].sum(
+            axis=1, dtype=np.int32)
+        missing = sizes - matched
+        coverage = np.zeros(len(sizes), np.int32)
+        np.floor_divide(matched * 100, sizes, out=coverage, where=sizes > 0)
+        selected = (sizes > 0) & (matched > 0) & (coverage >= min_coverage)
+        if max_missing is not None:
+            selected &= missing <= max_missing
+        order = np.flatnonzero(selected)
+        order = order[np.lexsort(
+            (recipe_ids[order], missing[order], -coverage[order]))]
+        return list(zip(recipe_ids[order].tolist(),
+                        coverage[order].tolist(),
+                        missing[order].tolist()))
+
+
+pantry_index = PantryIndex()
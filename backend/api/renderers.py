@@ -0,0 +1,54 @@
+import json
+
+from rest_framework.renderers import BaseRenderer
+
+from api import shopping_list
+
+
+class ShoppingListRenderer(BaseRenderer):
+    charset = 'utf-8'
+    export = None
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return json.dumps(data, ensure_ascii=False).encode('utf-8')
+
+    @property
+    def content_type(self):
+        if self.charset is None:
+            return self.media_type
+        return f'{self.media_type}; charset={self.charset}'
+
+
+class ShoppingListPdfRenderer(ShoppingListRenderer):
+    media_type = 'application/pdf'
+    format = 'pdf'
+    charset = None
+    export = staticmethod(shopping_list.to_pdf)
+
+
+class ShoppingListTxtRenderer(ShoppingListRenderer):
+    media_type = 'text/plain'
+    format = 'txt'
+    export = staticmethod(shopping_list.to_txt)
+
+
+class ShoppingListCsvRenderer(ShoppingListRenderer):
+    media_type = 'text/csv'
+    format = 'csv'
+    export = staticmethod(shopping_list.to_csv)
+
+
+class ShoppingListJsonRenderer(ShoppingListRenderer):
+    media_type = 'application/json'
+    format = 'json'
+    export = staticmethod(shopping_list.to_json)
+
+
+SHOPPING_LIST_RENDERERS = (
+    ShoppingListPdfRenderer,
+    ShoppingListTxtRenderer,
+    ShoppingListCsvRenderer,
+    ShoppingListJsonRenderer,
+)
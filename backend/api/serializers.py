@@ -1,17 +1,62 @@
 import base64
+import binascii
+import json
+from io import BytesIO
 
 from django.contrib.auth import get_user_model
 from django.core.exceptions import ValidationError
 from django.core.files.base import ContentFile
-from django.db.models import F
+from django.db import transaction
+from PIL import Image
 from rest_framework import serializers
 
+from api.enums import BatchEnums, ImageEnums, PantryEnums
 from api.validators import ingredients_validator, tags_exist_validator
-from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from recipes.models import (AmountIngredient, Ingredient, Recipe,
+                            ShoppingListItem, Tag)
 
 User = get_user_model()
 
 
+def get_subscribed_ids(request):
+    if not hasattr(request, '_subscribed_ids'):
+        request._subscribed_ids = (
+            set() if request.user.is_anonymous
+            else set(request.user.subscribers.values_list(
+                'author_id', flat=True)))
+    return request._subscribed_ids
+
+
+def set_subscribed(request, author_id, subscribed):
+    if not hasattr(request, '_subscribed_ids'):
+        return
+    if subscribed:
+        request._subscribed_ids.add(author_id)
+    else:
+        request._subscribed_ids.discard(author_id)
+
+
+def get_recipes_limit(request):
+    try:
+        limit = int(request.query_params.get('recipes_limit'))
+    except (TypeError, ValueError):
+        return None
+    return limit if limit > 0 else None
+
+
+def get_list(data, key):
+    if not hasattr(data, 'getlist'):
+        return data.get(key)
+    values = []
+    for value in data.getlist(key):
+        try:
+            value = json.loads(value)
+        except ValueError:
+            pass
+        values.extend(value if isinstance(value, list) else (value,))
+    return values
+
+
 class UserSerializer(serializers.ModelSerializer):
     is_subscribed = serializers.SerializerMethodField()
 
@@ -25,7 +70,7 @@ class UserSerializer(serializers.ModelSerializer):
         user = self.context.get('request').user
         if user.is_anonymous or user == author:
             return False
-        return author.subscribing.filter(user=user).exists()
+        return author.id in get_subscribed_ids(self.context.get('request'))
 
     def create(self, validated_data):
         user = User(email=validated_data['email'],
@@ -40,20 +85,54 @@ class UserSerializer(serializers.ModelSerializer):
 class ShortRecipeSerializer(serializers.ModelSerializer):
     class Meta:
         model = Recipe
-        fields = ('id', 'name', 'image', 'cooking_time')
-        read_only_fields = ('id', 'name', 'image', 'cooking_time')
+        fields = ('id', 'name', 'image', 'thumbnail', 'thumbnail_webp',
+                  'cooking_time')
+        read_only_fields = fields
+
+
+class RecipeIdsSerializer(serializers.Serializer):
+    ids = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=BatchEnums.MAX_IDS,
+    )
+
+
+class PantrySerializer(serializers.Serializer):
+    ingredients = serializers.ListField(
+        child=serializers.IntegerField(min_value=1),
+        allow_empty=False,
+        max_length=PantryEnums.MAX_INGREDIENTS,
+    )
+    min_coverage = serializers.IntegerField(
+        min_value=1, max_value=100,
+        default=PantryEnums.DEFAULT_MIN_COVERAGE,
+    )
+    max_missing = serializers.IntegerField(min_value=0, required=False)
 
 
 class SubscriptionSerializer(UserSerializer):
-    recipes = ShortRecipeSerializer(many=True, read_only=True)
+    recipes = serializers.SerializerMethodField()
     recipes_count = serializers.SerializerMethodField()
 
     class Meta:
         model = User
         exclude = ('password',)
-        read_only_fields = ('recipes_count',)
+        read_only_fields = ('recipes', 'recipes_count')
+
+    def get_recipes(self, author):
+        recipes = getattr(author, 'limited_recipes', None)
+        if recipes is None:
+            recipes = author.recipes.all()
+            limit = get_recipes_limit(self.context.get('request'))
+            if limit:
+                recipes = recipes[:limit]
+        return ShortRecipeSerializer(
+            recipes, many=True, context=self.context).data
 
     def get_recipes_count(self, author):
+        if hasattr(author, 'recipes_count'):
+            return author.recipes_count
         return author.recipes.count()
 
 
@@ -70,12 +149,42 @@ class IngredientSerializer(serializers.ModelSerializer):
 
 
 class Base64ImageField(serializers.ImageField):
+    default_error_messages = {
+        'too_large': 'Изображение больше {max_size} байт!',
+        'invalid_base64': 'Некорректное изображение в base64!',
+        'too_wide': 'Изображение больше {max_dimension} пикселей по стороне!',
+    }
+
     def to_internal_value(self, data):
         if isinstance(data, str) and data.startswith('data:image'):
-            image_format, image = data.split(';base64,')
+            image_format, _, image = data.partition(';base64,')
             ext = image_format.split('/')[-1]
-            data = ContentFile(base64.b64decode(image), name='temp.' + ext)
-        return super().to_internal_value(data)
+            data = ContentFile(self.decode(image), name='temp.' + ext)
+        elif getattr(data, 'size', 0) > ImageEnums.MAX_SIZE:
+            self.fail('too_large', max_size=ImageEnums.MAX_SIZE)
+        image = super().to_internal_value(data)
+        with Image.open(image) as opened:
+            if max(opened.size) > ImageEnums.MAX_DIMENSION:
+                self.fail('too_wide',
+                          max_dimension=ImageEnums.MAX_DIMENSION)
+        image.seek(0)
+        return image
+
+    def decode(self, image):
+        if len(image) > 4 * -(-ImageEnums.MAX_SIZE // 3) + 2:
+            self.fail('too_large', max_size=ImageEnums.MAX_SIZE)
+        image = ''.join(image.split())
+        chunk_size = ImageEnums.DECODE_CHUNK_SIZE // 3 * 4
+        decoded = BytesIO()
+        try:
+            for start in range(0, len(image), chunk_size):
+                decoded.write(base64.b64decode(
+                    image[start:start + chunk_size], validate=True))
+                if decoded.tell() > ImageEnums.MAX_SIZE:
+                    self.fail('too_large', max_size=ImageEnums.MAX_SIZE)
+        except binascii.Error:
+            self.fail('invalid_base64')
+        return decoded.getvalue()
 
 
 class RecipeSerializer(serializers.ModelSerializer):
@@ -97,6 +206,9 @@ class RecipeSerializer(serializers.ModelSerializer):
             'is_favorited',
             'is_in_shopping_cart',
             'image',
+            'image_webp',
+            'thumbnail',
+            'thumbnail_webp',
             'text',
             'cooking_time'
         )
@@ -105,41 +217,51 @@ class RecipeSerializer(serializers.ModelSerializer):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(recipe, 'is_favorited'):
+            return recipe.is_favorited
         return recipe.in_favorite.filter(user=user).exists()
 
     def get_is_in_shopping_cart(self, recipe):
         user = self.context.get('request').user
         if user.is_anonymous:
             return False
+        if hasattr(recipe, 'is_in_shopping_cart'):
+            return recipe.is_in_shopping_cart
         return user.shopping_cart.filter(recipe=recipe).exists()
 
     def get_ingredients(self, recipe):
-        return AmountIngredient.objects.filter(recipe=recipe).values(
-            'id', 'amount', name=F('ingredient__name'),
-            measurement_unit=F('ingredient__measurement_unit'))
+        return [
+            {'id': amount.id,
+             'amount': amount.amount,
+             'name': amount.ingredient.name,
+             'measurement_unit': amount.ingredient.measurement_unit}
+            for amount in recipe.ingredient.all()
+        ]
 
     def validate(self, data):
-        tags_ids = self.initial_data.get('tags')
-        ingredients = self.initial_data.get('ingredients')
+        tags_ids = get_list(self.initial_data, 'tags')
+        ingredients = get_list(self.initial_data, 'ingredients')
         if not tags_ids:
             raise ValidationError('У рецепта должен хотя бы один тег!')
         if not ingredients:
             raise ValidationError('У рецепта должен хотя бы один ингредиент!')
-        tags = tags_exist_validator(tags_ids, Tag)
-        ingredients = ingredients_validator(ingredients, Ingredient)
+        tags = tags_exist_validator(tags_ids)
+        ingredients = ingredients_validator(ingredients)
         data.update({'tags': tags,
                      'ingredients': ingredients,
                      'author': self.context.get('request').user})
         return data
 
+    @transaction.atomic
     def create(self, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
         recipe = Recipe.objects.create(**validated_data)
         recipe.tags.set(tags)
-        self._add_ingredients(recipe, ingredients)
+        self._add_ingredients(recipe, ingredients.values())
         return recipe
 
+    @transaction.atomic
     def update(self, recipe, validated_data):
         tags = validated_data.pop('tags')
         ingredients = validated_data.pop('ingredients')
@@ -147,16 +269,47 @@ class RecipeSerializer(serializers.ModelSerializer):
             if hasattr(recipe, key):
                 setattr(recipe, key, value)
         if tags:
-            recipe.tags.clear()
-            recipe.tags.set(tags)
+            self._update_tags(recipe, tags)
         if ingredients:
-            AmountIngredient.objects.filter(recipe=recipe).all().delete()
-            self._add_ingredients(recipe, ingredients)
+            self._update_ingredients(recipe, ingredients)
         recipe.save()
         return recipe
 
+    @staticmethod
+    def _update_tags(recipe, tags):
+        current = set(recipe.tags.values_list('id', flat=True))
+        incoming = {tag.id for tag in tags}
+        if current - incoming:
+            recipe.tags.remove(*(current - incoming))
+        if incoming - current:
+            recipe.tags.add(*(incoming - current))
+
+    def _update_ingredients(self, recipe, ingredients):
+        current = {amount.ingredient_id: amount
+                   for amount in recipe.ingredient.all()}
+        incoming = {ingredient.id: (ingredient, amount)
+                    for ingredient, amount in ingredients.values()}
+        stale = current.keys() - incoming.keys()
+        if stale:
+            AmountIngredient.objects.remove(recipe.id, stale)
+        changed = []
+        for ingredient_id, (_, amount) in incoming.items():
+            if (ingredient_id in current
+                    and current[ingredient_id].amount != amount):
+                current[ingredient_id].amount = amount
+                changed.append(current[ingredient_id])
+        AmountIngredient.objects.bulk_update(changed, ('amount',))
+        added = [incoming[ingredient_id]
+                 for ingredient_id in incoming.keys() - current.keys()]
+        self._add_ingredients(recipe, added)
+        if stale or changed or added:
+            ShoppingListItem.objects.refresh_for_recipe(
+                recipe.id,
+                [*stale, *(amount.ingredient_id for amount in changed),
+                 *(ingredient.id for ingredient, _ in added)])
+
     def _add_ingredients(self, recipe, ingredients):
         AmountIngredient.objects.bulk_create(
             AmountIngredient(
                 recipe=recipe, ingredient=ingredient, amount=amount)
-            for ingredient, amount in ingredients.values())
+            for ingredient, amount in ingredients)
@@ -0,0 +1,72 @@
+import csv
+import json
+from tempfile import SpooledTemporaryFile
+
+from django.conf import settings
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfbase import pdfmetrics
+from reportlab.pdfbase.ttfonts import TTFont
+from reportlab.pdfgen import canvas
+
+from api.enums import ShoppingListPdfEnums as Pdf
+
+FONT = 'Westhorn'
+TITLE = 'Список покупок'
+FIELDS = ('name', 'amount', 'measurement_unit')
+
+
+class Echo:
+    def write(self, value):
+        return value
+
+
+def register_fonts():
+    pdfmetrics.registerFont(
+        TTFont(FONT, settings.BASE_DIR / 'data' / f'{FONT}.ttf'))
+
+
+def to_lines(items):
+    return (f'{name}: {amount} {unit}' for name, amount, unit in items)
+
+
+def to_txt(items):
+    for line in to_lines(items):
+        yield f'{line}\n'
+
+
+def to_csv(items):
+    writer = csv.writer(Echo())
+    yield writer.writerow(FIELDS)
+    for item in items:
+        yield writer.writerow(item)
+
+
+def to_json(items):
+    separator = ''
+    yield '['
+    for item in items:
+        yield separator + json.dumps(dict(zip(FIELDS, item)),
+                                     ensure_ascii=False)
+        separator = ', '
+    yield ']'
+
+
+def to_pdf(items):
+    buffer = SpooledTemporaryFile(max_size=Pdf.SPOOL_MAX_SIZE)
+    page = canvas.Canvas(buffer, pagesize=A4)
+    page.setFont(FONT, size=Pdf.TITLE_FONT_SIZE)
+    page.drawString(Pdf.TITLE_X, Pdf.TOP, TITLE)
+    height = Pdf.TOP - Pdf.TITLE_MARGIN
+    page.setFont(FONT, size=Pdf.FONT_SIZE)
+    for line in to_lines(items):
+        if height < Pdf.BOTTOM:
+            page.showPage()
+            page.setFont(FONT, size=Pdf.FONT_SIZE)
+            height = Pdf.TOP
+        page.drawString(Pdf.LINE_X, height, line)
+        height -= Pdf.LINE_HEIGHT
+    page.showPage()
+    page.save()
+    buffer.seek(0)
+    with buffer:
+        yield from iter(lambda: buffer.read(Pdf.CHUNK_SIZE), b'')
@@ -0,0 +1,61 @@
+from django.contrib.auth import get_user_model
+from django.db import transaction
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+
+from api import cache
+from api.indexes import IngredientIndex, TagIndex
+from recipes.models import (AmountIngredient, Favorite, Ingredient, Recipe,
+                            ShoppingCart, Tag)
+from recipes.signals import (ingredients_imported, popularity_updated,
+                             user_recipes_changed)
+from users.models import Subscription
+from users.signals import subscriptions_changed
+
+User = get_user_model()
+
+NAMESPACES = {
+    Recipe: 'recipes',
+    AmountIngredient: 'recipes',
+    User: 'users',
+    Tag: TagIndex.namespace,
+    Ingredient: IngredientIndex.namespace,
+}
+
+
+def invalidate(namespace):
+    transaction.on_commit(lambda: cache.bump_version(namespace))
+
+
+@receiver((post_save, post_delete))
+def invalidate_model(sender, update_fields=None, **kwargs):
+    namespace = NAMESPACES.get(sender)
+    if namespace is not None and update_fields != {'last_login'}:
+        invalidate(namespace)
+
+
+@receiver((post_save, post_delete))
+def invalidate_user_relations(sender, instance, **kwargs):
+    if sender in (Favorite, ShoppingCart, Subscription):
+        invalidate(cache.USER_NAMESPACE.format(instance.user_id))
+
+
+@receiver((user_recipes_changed, subscriptions_changed))
+def invalidate_changed_relations(sender, user_id, **kwargs):
+    invalidate(cache.USER_NAMESPACE.format(user_id))
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def invalidate_recipe_tags(sender, action, **kwargs):
+    if action.startswith('post_'):
+        invalidate(NAMESPACES[Recipe])
+
+
+@receiver(ingredients_imported)
+def invalidate_imported_ingredients(sender, **kwargs):
+    cache.bump_version(IngredientIndex.namespace)
+
+
+@receiver(popularity_updated)
+def invalidate_popularity(sender, **kwargs):
+    cache.bump_version('popularity')
@@ -0,0 +1,35 @@
+import time
+import tracemalloc
+
+from api.tests.utils import APITestCase, make_client, make_recipes, make_user
+from recipes.models import Ingredient, ShoppingCart
+
+CART_SIZES = (10, 100, 1000)
+
+
+class ShoppingListPdfBenchmark(APITestCase):
+    def test_download_latency_and_memory(self):
+        user = make_user('buyer')
+        client = make_client(user)
+        for size in CART_SIZES:
+            ShoppingCart.objects.filter(user=user).delete()
+            ingredients = Ingredient.objects.bulk_create(
+                Ingredient(name=f'ingredient {size} {number}',
+                           measurement_unit='г')
+                for number in range(size))
+            recipe, = make_recipes(user, 1, ingredients=ingredients)
+            recipe.name = f'cart {size}'
+            recipe.save(update_fields=('name',))
+            ShoppingCart.objects.create(user=user, recipe=recipe)
+            tracemalloc.start()
+            started = time.perf_counter()
+            response = client.get(
+                '/api/recipes/download_shopping_cart/?format=pdf')
+            size_bytes = sum(map(len, response.streaming_content))
+            elapsed = time.perf_counter() - started
+            peak = tracemalloc.get_traced_memory()[1]
+            tracemalloc.stop()
+            self.assertEqual(response.status_code, 200)
+            print(f'\n{size} ingredients: {elapsed * 1000:.0f} ms, '
+                  f'peak {peak / 1024:.0f} KiB, '
+                  f'pdf {size_bytes / 1024:.0f} KiB')
@@ -0,0 +1,67 @@
+import time
+
+from django.core.cache import cache
+from django.db import connection
+from django.db.models import Exists, OuterRef
+
+from api.tests.utils import APITestCase, make_client, make_user
+from recipes.models import Recipe, Tag
+
+RECIPES = 100_000
+TAGS = 8
+REPEATS = 5
+
+
+class TagFilterBenchmark(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = make_user('author')
+        cls.tags = Tag.objects.bulk_create(
+            Tag(name=f'tag{i}', slug=f'tag{i}', color=f'#00000{i}')
+            for i in range(TAGS))
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'INSERT INTO recipes_recipe (name, author_id, image, text,'
+                ' cooking_time, created, updated, image_webp, thumbnail,'
+                ' thumbnail_webp, popularity, trending)'
+                " SELECT 'recipe ' || number, %s, 'images/recipe.png',"
+                " 'text', 5, now(), now(), '', '', '', 0, 0"
+                ' FROM generate_series(1, %s) AS number',
+                (author.id, RECIPES))
+            cursor.execute(
+                'INSERT INTO recipes_recipe_tags (recipe_id, tag_id)'
+                ' SELECT recipe.id, tag.id FROM recipes_recipe recipe'
+                ' JOIN recipes_tag tag ON (recipe.id + tag.id) % 3 = 0')
+            cursor.execute('ANALYZE')
+
+    def time(self, action):
+        action()
+        started = time.perf_counter()
+        for _ in range(REPEATS):
+            action()
+        return (time.perf_counter() - started) / REPEATS * 1000
+
+    def time_queryset(self, queryset):
+        return self.time(lambda: (list(queryset[:6]), queryset.count()))
+
+    def test_tag_filter(self):
+        client = make_client()
+        for count in (1, 3, TAGS):
+            tags = self.tags[:count]
+            slugs = [tag.slug for tag in tags]
+            joined = Recipe.objects.filter(tags__slug__in=slugs).distinct()
+            exists = Recipe.objects.filter(Exists(
+                Recipe.tags.through.objects.filter(
+                    recipe=OuterRef('pk'), tag__in=tags)))
+            self.assertEqual(joined.count(), exists.count())
+
+            def request():
+                cache.clear()
+                response = client.get(
+                    '/api/recipes/', {'tags': slugs, 'limit': 6})
+                self.assertEqual(response.status_code, 200)
+
+            print(f'\n{count} tags ({exists.count()} recipes): '
+                  f'JOIN + DISTINCT {self.time_queryset(joined):.1f} ms, '
+                  f'EXISTS {self.time_queryset(exists):.1f} ms, '
+                  f'endpoint {self.time(request):.1f} ms')
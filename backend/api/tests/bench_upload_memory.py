@@ -0,0 +1,10 @@
+from api.tests import test_upload_memory
+
+
+class UploadMemoryBenchmark(test_upload_memory.UploadMemoryTest):
+    def test_multipart_uses_less_memory_than_base64(self):
+        base64_growth, multipart_growth = self.measure_both()
+        print(f'\n10 MiB image, peak RSS growth: '
+              f'base64 JSON {base64_growth / 2 ** 20:.0f} MiB, '
+              f'multipart {multipart_growth / 2 ** 20:.0f} MiB')
+        self.assertLess(multipart_growth, base64_growth)
@@ -0,0 +1,66 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.enums import BatchEnums
+from api.tests.utils import APITestCase, make_client, make_recipes, make_user
+from recipes.models import Favorite, ShoppingCart
+
+PATHS = ((Favorite, '/api/recipes/favorite/'),
+         (ShoppingCart, '/api/recipes/shopping_cart/'))
+
+
+class BatchUserRecipesTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('planner')
+        self.recipes = make_recipes(make_user('author'), 3)
+        self.ids = [recipe.id for recipe in self.recipes]
+        self.missing = max(self.ids) + 1
+        self.client = make_client(self.user)
+
+    def post(self, url, ids, method='post'):
+        return getattr(self.client, method)(url, {'ids': ids}, format='json')
+
+    def statuses(self, response):
+        self.assertEqual(response.status_code, 200)
+        return [(row['id'], row['status'])
+                for row in response.data['results']]
+
+    def test_add_and_remove(self):
+        first, second, third = self.ids
+        for model, url in PATHS:
+            with self.subTest(url=url):
+                self.post(url, [first])
+                self.assertEqual(
+                    self.statuses(self.post(
+                        url, [first, second, self.missing, second])),
+                    [(first, 'exists'), (second, 'created'),
+                     (self.missing, 'not_found')])
+                self.assertEqual(
+                    set(model.objects.values_list('recipe', flat=True)),
+                    {first, second})
+                self.assertEqual(
+                    self.statuses(self.post(
+                        url, [first, second, third], 'delete')),
+                    [(first, 'deleted'), (second, 'deleted'),
+                     (third, 'not_found')])
+                self.assertFalse(model.objects.exists())
+
+    def test_queries_do_not_depend_on_batch_size(self):
+        url = '/api/recipes/favorite/'
+        with CaptureQueriesContext(connection) as context:
+            self.post(url, self.ids[:1])
+        with self.assertNumQueries(len(context.captured_queries)):
+            self.post(url, self.ids)
+
+    def test_invalid_ids(self):
+        for ids in ([], ['abc'], [0], [1] * (BatchEnums.MAX_IDS + 1)):
+            with self.subTest(ids=ids):
+                self.assertEqual(
+                    self.post('/api/recipes/favorite/', ids).status_code,
+                    400)
+
+    def test_anonymous(self):
+        self.assertEqual(make_client().post(
+            '/api/recipes/favorite/', {'ids': self.ids},
+            format='json').status_code, 401)
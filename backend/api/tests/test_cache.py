@@ -0,0 +1,29 @@
+import os
+import subprocess
+import sys
+import time
+from unittest import mock
+
+from django.conf import settings
+
+from api.cache import bump_version, get_version
+from api.tests.utils import APITestCase
+
+
+class SharedCacheTest(APITestCase):
+    def test_version_bumped_by_another_process(self):
+        version = get_version('tags')
+        subprocess.run(
+            (sys.executable, 'manage.py', 'shell', '-c',
+             'from api.cache import bump_version; bump_version("tags")'),
+            cwd=settings.BASE_DIR, check=True, env={
+                **os.environ,
+                'CACHE_LOCATION': settings.CACHES['default']['LOCATION']})
+        self.assertNotEqual(get_version('tags'), version)
+
+    def test_bumped_version_does_not_expire(self):
+        get_version('tags')
+        version = bump_version('tags')
+        later = time.time() + settings.CACHES['default']['TIMEOUT'] * 24
+        with mock.patch('time.time', return_value=later):
+            self.assertEqual(get_version('tags'), version)
@@ -0,0 +1,67 @@
+from api.tests.utils import APITestCase, make_client, make_recipes, make_user
+from recipes.models import Favorite
+
+
+class RecipeConditionalGetTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipe, = make_recipes(make_user('author'), 1)
+        self.client = make_client()
+
+    def test_not_modified(self):
+        url = f'/api/recipes/{self.recipe.id}/'
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        response = self.client.get(
+            url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(response.status_code, 304)
+
+    def test_invalid_pk_is_not_found(self):
+        for pk in ('abc', '999999'):
+            with self.subTest(pk=pk):
+                self.assertEqual(
+                    self.client.get(f'/api/recipes/{pk}/').status_code, 404)
+
+
+class RecipeListConditionalGetTest(APITestCase):
+    url = '/api/recipes/?limit=6'
+
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader')
+        self.recipe, = make_recipes(make_user('author'), 1)
+
+    def test_cache_hit_and_not_modified_skip_database(self):
+        client = make_client()
+        for url in (self.url, f'{self.url}&pagination=nocount'):
+            with self.subTest(url=url):
+                etag = client.get(url)['ETag']
+                with self.assertNumQueries(0):
+                    response = client.get(url)
+                self.assertEqual(response['X-Cache'], 'HIT')
+                with self.assertNumQueries(0):
+                    response = client.get(url, HTTP_IF_NONE_MATCH=etag)
+                self.assertEqual(response.status_code, 304)
+
+    def test_not_modified_for_user_checks_only_token(self):
+        client = make_client(self.user)
+        etag = client.get(self.url)['ETag']
+        with self.assertNumQueries(1):
+            response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+    def test_etag_changes_after_writes(self):
+        client = make_client(self.user)
+        etag = client.get(self.url)['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            Favorite.objects.create(user=self.user, recipe=self.recipe)
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.data['results'][0]['is_favorited'])
+        etag = response['ETag']
+        with self.captureOnCommitCallbacks(execute=True):
+            self.recipe.name = 'renamed'
+            self.recipe.save()
+        response = client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.data['results'][0]['name'], 'renamed')
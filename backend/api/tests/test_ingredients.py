@@ -0,0 +1,17 @@
+from api.tests.utils import APITestCase, make_client
+from recipes.models import Ingredient
+
+
+class IngredientSearchTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        Ingredient.objects.bulk_create(
+            Ingredient(name=name, measurement_unit='г')
+            for name in ('Сахарная пудра', 'сахар', 'Ванильный сахар',
+                         'соль'))
+
+    def test_prefix_only_case_insensitive(self):
+        response = make_client().get('/api/ingredients/', {'name': 'САХ'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual([ingredient['name'] for ingredient in response.data],
+                         ['сахар', 'Сахарная пудра'])
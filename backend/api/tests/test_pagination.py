@@ -0,0 +1,44 @@
+import json
+from base64 import urlsafe_b64encode
+
+from api.tests.utils import APITestCase, make_client, make_recipes, make_user
+
+
+def encode(position):
+    return urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+class KeysetPaginationTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.recipes = make_recipes(make_user('author'), 5)
+        self.client = make_client()
+
+    def get(self, **params):
+        return self.client.get(
+            '/api/recipes/', {'pagination': 'cursor', 'limit': 2, **params})
+
+    def walk(self, **params):
+        ids, response = [], self.get(**params)
+        while True:
+            self.assertEqual(response.status_code, 200)
+            ids += [recipe['id'] for recipe in response.data['results']]
+            if response.data['next'] is None:
+                return ids
+            response = self.client.get(response.data['next'])
+
+    def test_walks_every_page(self):
+        self.assertEqual(
+            self.walk(), [recipe.id for recipe in self.recipes])
+        self.assertEqual(
+            self.walk(ordering='popular'),
+            sorted(recipe.id for recipe in self.recipes))
+        self.assertEqual(len(self.walk(search='recipe')), 5)
+
+    def test_invalid_cursor(self):
+        for cursor in ('not-base64!', encode({'name': 'x'}),
+                       encode(['x']), encode(['x', 'abc']),
+                       encode(['x', {'id': 1}]), encode(['x', None]),
+                       encode([['x'], 1])):
+            with self.subTest(cursor=cursor):
+                self.assertEqual(self.get(cursor=cursor).status_code, 404)
@@ -0,0 +1,59 @@
+from datetime import timedelta
+from io import StringIO
+
+from django.core.management import call_command
+from django.utils import timezone
+
+from api.tests.utils import APITestCase, make_client, make_recipes, make_user
+from recipes.models import Favorite, Recipe, ShoppingCart
+
+HALF_LIFE = timedelta(hours=72)
+WINDOW = timedelta(days=30)
+
+
+class PopularityTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader')
+        self.old, self.recent = make_recipes(make_user('author'), 2)
+        self.client = make_client()
+        self.now = timezone.now()
+
+    def add(self, model, recipe, created):
+        model.objects.create(user=self.user, recipe=recipe, created=created)
+
+    def update_popularity(self):
+        return Recipe.objects.update_popularity(self.now, HALF_LIFE, WINDOW)
+
+    def get_ids(self, ordering):
+        response = self.client.get(
+            '/api/recipes/', {'ordering': ordering, 'limit': 6})
+        return [recipe['id'] for recipe in response.data['results']]
+
+    def test_scores_and_ordering(self):
+        ancient = self.now - WINDOW - timedelta(days=1)
+        self.add(Favorite, self.old, ancient)
+        self.add(ShoppingCart, self.old, ancient)
+        self.add(Favorite, self.recent, self.now - HALF_LIFE)
+        self.assertEqual(self.update_popularity(), 2)
+        self.old.refresh_from_db()
+        self.recent.refresh_from_db()
+        self.assertEqual((self.old.popularity, self.old.trending), (2, 0))
+        self.assertEqual(self.recent.popularity, 1)
+        self.assertAlmostEqual(self.recent.trending, 0.5)
+        self.assertEqual(self.update_popularity(), 0)
+        self.assertEqual(
+            self.get_ids('popular'), [self.old.id, self.recent.id])
+        self.assertEqual(
+            self.get_ids('trending'), [self.recent.id, self.old.id])
+
+    def test_etag_follows_scores(self):
+        url = '/api/recipes/?ordering=trending&limit=6'
+        etag = self.client.get(url)['ETag']
+        self.add(Favorite, self.old, self.now)
+        call_command('updatepopularity', stdout=StringIO())
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [recipe['id'] for recipe in response.data['results']],
+            [self.old.id, self.recent.id])
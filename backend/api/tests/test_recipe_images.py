@@ -0,0 +1,55 @@
+import base64
+import shutil
+import tempfile
+from io import BytesIO
+
+from django.test import override_settings
+from PIL import Image
+
+from api.tests.utils import APITestCase, make_catalog, make_client, make_user
+from recipes.models import Recipe
+
+
+def encode_image(size, image_format='JPEG', truncate=0):
+    buffer = BytesIO()
+    Image.effect_noise(size, 64).convert('RGB').save(buffer, image_format)
+    data = buffer.getvalue()
+    if truncate:
+        data = data[:-truncate]
+    return (f'data:image/{image_format.lower()};base64,'
+            + base64.b64encode(data).decode())
+
+
+class RecipeImageVariantsTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.media_root)
+        media = override_settings(MEDIA_ROOT=self.media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        tags, ingredients = make_catalog()
+        self.client = make_client(make_user('author'))
+        self.payload = {
+            'name': 'recipe', 'text': 'text', 'cooking_time': 5,
+            'tags': [tags[0].id],
+            'ingredients': [{'id': ingredients[0].id, 'amount': 10}],
+        }
+
+    def create(self, image):
+        return self.client.post(
+            '/api/recipes/', {**self.payload, 'image': image}, format='json')
+
+    def test_variants_created(self):
+        response = self.create(encode_image((800, 600)))
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.data['thumbnail'].endswith('.jpg'))
+        self.assertTrue(response.data['thumbnail_webp'].endswith('.webp'))
+
+    def test_truncated_image_skips_variants(self):
+        response = self.create(encode_image((800, 600), truncate=5000))
+        self.assertEqual(response.status_code, 201)
+        recipe = Recipe.objects.get(pk=response.data['id'])
+        self.assertTrue(recipe.image)
+        self.assertFalse(recipe.thumbnail)
+        self.assertFalse(recipe.image_webp)
@@ -0,0 +1,38 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import (APITestCase, make_catalog, make_client,
+                             make_recipes, make_user)
+from recipes.models import Favorite, ShoppingCart
+
+
+class RecipeListQueriesTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('author')
+        tags, ingredients = make_catalog()
+        self.recipes = make_recipes(self.user, 50, tags[:2], ingredients[:3])
+        Favorite.objects.create(user=self.user, recipe=self.recipes[0])
+        ShoppingCart.objects.create(user=self.user, recipe=self.recipes[1])
+        self.client = make_client(self.user)
+
+    def count_queries(self, limit):
+        with CaptureQueriesContext(connection) as context:
+            response = self.client.get(f'/api/recipes/?limit={limit}')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(len(response.data['results']), limit)
+        return len(context.captured_queries)
+
+    def test_queries_do_not_depend_on_page_size(self):
+        queries = self.count_queries(1)
+        with self.assertNumQueries(queries):
+            self.client.get('/api/recipes/?limit=10')
+        self.assertEqual(self.count_queries(50), queries)
+
+    def test_flags_are_annotated(self):
+        response = self.client.get('/api/recipes/?limit=50')
+        recipes = {recipe['id']: recipe for recipe in response.data['results']}
+        self.assertTrue(recipes[self.recipes[0].id]['is_favorited'])
+        self.assertFalse(recipes[self.recipes[0].id]['is_in_shopping_cart'])
+        self.assertTrue(recipes[self.recipes[1].id]['is_in_shopping_cart'])
+        self.assertFalse(recipes[self.recipes[2].id]['is_favorited'])
@@ -0,0 +1,66 @@
+from unittest import mock
+
+from api.tests.utils import (APITestCase, make_catalog, make_client,
+                             make_recipes, make_user)
+from recipes.models import (AmountIngredient, Recipe, ShoppingCart,
+                            ShoppingListItem)
+
+
+class RecipeUpdateDiffTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tags, self.ingredients = make_catalog()
+        author = make_user('author')
+        self.recipe, = make_recipes(
+            author, 1, self.tags[:2], self.ingredients[:3])
+        ShoppingCart.objects.create(user=author, recipe=self.recipe)
+        self.client = make_client(author)
+
+    def amounts(self):
+        return dict(AmountIngredient.objects.filter(
+            recipe=self.recipe).values_list('ingredient', 'id'))
+
+    def tag_links(self):
+        return set(Recipe.tags.through.objects.filter(
+            recipe=self.recipe).values_list('tag', 'id'))
+
+    def update(self, tags, ingredients):
+        response = self.client.patch(f'/api/recipes/{self.recipe.id}/', {
+            'name': 'recipe', 'text': 'new text', 'cooking_time': 5,
+            'tags': [tag.id for tag in tags],
+            'ingredients': [
+                {'id': ingredient.id, 'amount': amount}
+                for ingredient, amount in ingredients],
+        }, format='json')
+        self.assertEqual(response.status_code, 200)
+        return response
+
+    def test_untouched_rows_keep_ids(self):
+        amounts, links = self.amounts(), self.tag_links()
+        self.update(self.tags[:2], (
+            (ingredient, 10) for ingredient in self.ingredients[:3]))
+        self.assertEqual(self.amounts(), amounts)
+        self.assertEqual(self.tag_links(), links)
+
+    def test_diff_refreshes_shopping_list_once(self):
+        first, second, _, fourth = self.ingredients[:4]
+        amounts = self.amounts()
+        refresh = mock.patch.object(
+            type(ShoppingListItem.objects), 'refresh_for_recipe',
+            autospec=True,
+            side_effect=type(ShoppingListItem.objects).refresh_for_recipe)
+        with refresh as refresh_for_recipe:
+            self.update(self.tags[1:3], ((first, 10), (second, 20),
+                                         (fourth, 30)))
+        refresh_for_recipe.assert_called_once()
+        current = self.amounts()
+        self.assertEqual(current[first.id], amounts[first.id])
+        self.assertEqual(current[second.id], amounts[second.id])
+        self.assertEqual(set(current), {first.id, second.id, fourth.id})
+        self.assertEqual(
+            {tag for tag, _ in self.tag_links()},
+            {tag.id for tag in self.tags[1:3]})
+        self.assertEqual(
+            dict(ShoppingListItem.objects.values_list(
+                'ingredient', 'total_amount')),
+            {first.id: 10, second.id: 20, fourth.id: 30})
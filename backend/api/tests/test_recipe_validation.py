@@ -0,0 +1,57 @@
+from api.tests.utils import (APITestCase, make_catalog, make_client,
+                             make_recipes, make_user)
+from recipes.models import Tag
+
+
+class RecipeCatalogValidationTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.tags, self.ingredients = make_catalog()
+        author = make_user('author')
+        self.recipe, = make_recipes(
+            author, 1, self.tags[:1], self.ingredients[:1])
+        self.client = make_client(author)
+        self.url = f'/api/recipes/{self.recipe.id}/'
+
+    def payload(self, tags=None, ingredients=None):
+        return {
+            'name': 'recipe', 'text': 'text', 'cooking_time': 5,
+            'tags': tags or [self.tags[0].id],
+            'ingredients': ingredients or [
+                {'id': self.ingredients[0].id, 'amount': 10}],
+        }
+
+    def patch(self, **kwargs):
+        return self.client.patch(
+            self.url, self.payload(**kwargs), format='json')
+
+    def test_unknown_ids_rejected(self):
+        missing = max(ingredient.id for ingredient in self.ingredients) + 1
+        cases = {
+            'tag': {'tags': [self.tags[0].id, max(
+                tag.id for tag in self.tags) + 1]},
+            'ingredient': {'ingredients': [
+                {'id': self.ingredients[0].id, 'amount': 10},
+                {'id': missing, 'amount': 10}]},
+            'format': {'ingredients': [{'id': 'abc', 'amount': 10}]},
+        }
+        for case, kwargs in cases.items():
+            with self.subTest(case=case):
+                self.assertEqual(self.patch(**kwargs).status_code, 400)
+
+    def test_rejection_does_not_query_catalog(self):
+        payload = self.payload(tags=[max(tag.id for tag in self.tags) + 1])
+        self.client.post('/api/recipes/', payload, format='json')
+        with self.assertNumQueries(1):
+            response = self.client.post(
+                '/api/recipes/', payload, format='json')
+        self.assertEqual(response.status_code, 400)
+
+    def test_new_tag_accepted(self):
+        self.assertEqual(self.patch().status_code, 200)
+        with self.captureOnCommitCallbacks(execute=True):
+            tag = Tag.objects.create(name='new', slug='new', color='#FFFFFF')
+        response = self.patch(tags=[tag.id])
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            [tag['id'] for tag in response.data['tags']], [tag.id])
@@ -0,0 +1,44 @@
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from api.tests.utils import APITestCase, make_client, make_user
+from recipes.models import Recipe
+
+
+class RecipeSearchTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        author = make_user('author')
+        self.recipes = {
+            name: Recipe.objects.create(
+                name=name, author=author, image='images/recipe.png',
+                text=text, cooking_time=5)
+            for name, text in (
+                ('Салат', 'Свежая морковь и капуста'),
+                ('Щи из капусты', 'Варить час'),
+                ('Рагу', 'Морковь свежая, картофель'),
+            )
+        }
+        self.client = make_client()
+
+    def search(self, text):
+        response = self.client.get(
+            '/api/recipes/', {'search': text, 'limit': 10})
+        self.assertEqual(response.status_code, 200)
+        return [recipe['name'] for recipe in response.data['results']]
+
+    def test_name_match_ranks_first(self):
+        self.assertEqual(self.search('капуста'), ['Щи из капусты', 'Салат'])
+
+    def test_phrase(self):
+        self.assertEqual(self.search('"свежая морковь"'), ['Салат'])
+
+    def test_negation(self):
+        self.assertEqual(self.search('морковь -капуста'), ['Рагу'])
+
+    def test_list_does_not_load_search_vector(self):
+        with CaptureQueriesContext(connection) as context:
+            self.client.get('/api/recipes/', {'limit': 10})
+        self.assertTrue(context.captured_queries)
+        for query in context.captured_queries:
+            self.assertNotIn('search_vector', query['sql'])
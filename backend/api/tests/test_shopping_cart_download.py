@@ -0,0 +1,35 @@
+from api.tests.utils import (APITestCase, make_catalog, make_client,
+                             make_recipes, make_user)
+from recipes.models import ShoppingCart
+
+URL = '/api/recipes/download_shopping_cart/'
+
+
+class DownloadShoppingCartErrorsTest(APITestCase):
+    def assertJsonError(self, response, status_code):
+        self.assertEqual(response.status_code, status_code)
+        self.assertEqual(response['Content-Type'], 'application/json')
+        self.assertIsInstance(response.json(), dict)
+
+    def test_anonymous(self):
+        self.assertJsonError(make_client().get(URL), 401)
+
+    def test_unknown_format(self):
+        client = make_client(make_user('buyer'))
+        self.assertJsonError(client.get(URL, {'format': 'xml'}), 404)
+
+    def test_empty_cart(self):
+        client = make_client(make_user('buyer'))
+        self.assertJsonError(client.get(URL), 400)
+
+    def test_export_keeps_requested_format(self):
+        user = make_user('buyer')
+        _, ingredients = make_catalog()
+        recipe, = make_recipes(user, 1, ingredients=ingredients[:1])
+        ShoppingCart.objects.create(user=user, recipe=recipe)
+        response = make_client(user).get(URL, {'format': 'txt'})
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            response['Content-Type'], 'text/plain; charset=utf-8')
+        self.assertIn('ingredient0', b''.join(
+            response.streaming_content).decode())
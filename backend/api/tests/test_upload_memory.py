@@ -0,0 +1,119 @@
+import base64
+import json
+import os
+import resource
+import subprocess
+import sys
+import tempfile
+from types import SimpleNamespace
+from unittest import mock, skipUnless
+
+from django.conf import settings
+from django.db import connection, transaction
+from django.test import SimpleTestCase, override_settings
+from django.test.client import BOUNDARY, MULTIPART_CONTENT, encode_multipart
+from PIL import Image
+
+from api.enums import ImageEnums
+from api.tests.utils import make_catalog, make_client, make_user
+
+IMAGE_SIZE = 10 * 1024 * 1024
+IMAGE_LIMITS = SimpleNamespace(
+    MAX_SIZE=2 * IMAGE_SIZE,
+    MAX_DIMENSION=ImageEnums.MAX_DIMENSION,
+    DECODE_CHUNK_SIZE=ImageEnums.DECODE_CHUNK_SIZE,
+)
+
+
+def current_rss():
+    with open('/proc/self/statm') as statm:
+        return int(statm.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+
+
+def peak_rss():
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def build_request(upload, image_path, tags, ingredients):
+    fields = {'name': f'{upload} upload', 'text': 'text', 'cooking_time': 5}
+    with open(image_path, 'rb') as image:
+        if upload == 'multipart':
+            body = encode_multipart(BOUNDARY, {
+                **fields, 'image': image, 'tags': [tags[0].id],
+                'ingredients': json.dumps(
+                    [{'id': ingredients[0].id, 'amount': 10}]),
+            })
+            return body, MULTIPART_CONTENT
+        image = base64.b64encode(image.read()).decode()
+    body = json.dumps({
+        **fields, 'image': f'data:image/png;base64,{image}',
+        'tags': [tags[0].id],
+        'ingredients': [{'id': ingredients[0].id, 'amount': 10}],
+    }).encode()
+    return body, 'application/json'
+
+
+def measure(upload, image_path, result_path):
+    with tempfile.TemporaryDirectory() as media_root, \
+            override_settings(ALLOWED_HOSTS=['testserver'],
+                              MEDIA_ROOT=media_root,
+                              DATA_UPLOAD_MAX_MEMORY_SIZE=None), \
+            mock.patch('api.serializers.ImageEnums', IMAGE_LIMITS), \
+            mock.patch('recipes.signals.save_variants'), \
+            transaction.atomic():
+        tags, ingredients = make_catalog()
+        client = make_client(make_user('uploader'))
+        body, content_type = build_request(
+            upload, image_path, tags, ingredients)
+        client.get('/api/recipes/')
+        before = current_rss()
+        response = client.generic(
+            'POST', '/api/recipes/', body, content_type=content_type)
+        with open(result_path, 'w') as result:
+            json.dump({'status': response.status_code,
+                       'growth': peak_rss() - before}, result)
+        transaction.set_rollback(True)
+
+
+@skipUnless(os.path.exists('/proc/self/statm'), 'нужен Linux /proc')
+class UploadMemoryTest(SimpleTestCase):
+    databases = {'default'}
+
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        image = Image.frombytes(
+            'RGB', (2048, IMAGE_SIZE // (2048 * 3)), os.urandom(IMAGE_SIZE))
+        with tempfile.NamedTemporaryFile(suffix='.png',
+                                         delete=False) as file:
+            image.save(file, 'PNG', compress_level=0)
+        cls.image_path = file.name
+
+    @classmethod
+    def tearDownClass(cls):
+        os.remove(cls.image_path)
+        super().tearDownClass()
+
+    def measure(self, upload):
+        with tempfile.TemporaryDirectory() as directory:
+            result_path = os.path.join(directory, 'result.json')
+            subprocess.run(
+                (sys.executable, 'manage.py', 'shell', '-c',
+                 'from api.tests.test_upload_memory import measure; '
+                 f'measure({upload!r}, {self.image_path!r}, '
+                 f'{result_path!r})'),
+                cwd=settings.BASE_DIR, check=True, capture_output=True,
+                env={**os.environ,
+                     'POSTGRES_DB': connection.settings_dict['NAME']})
+            with open(result_path) as result:
+                result = json.load(result)
+        self.assertEqual(result['status'], 201)
+        return result['growth']
+
+    def measure_both(self):
+        self.assertGreater(os.path.getsize(self.image_path), IMAGE_SIZE)
+        return self.measure('json'), self.measure('multipart')
+
+    def test_multipart_uses_less_memory_than_base64(self):
+        base64_growth, multipart_growth = self.measure_both()
+        self.assertLess(multipart_growth, base64_growth)
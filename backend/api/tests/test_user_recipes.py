@@ -0,0 +1,59 @@
+from api.tests.utils import APITestCase, make_client, make_recipes, make_user
+from recipes.models import Favorite, ShoppingCart
+from users.models import Subscription
+
+
+class UserRecipeWritesTest(APITestCase):
+    def setUp(self):
+        super().setUp()
+        self.user = make_user('reader')
+        self.author = make_user('author')
+        self.recipe, = make_recipes(self.author, 1)
+        self.client = make_client(self.user)
+
+    def test_add_and_remove(self):
+        for model, path in ((Favorite, 'favorite'),
+                            (ShoppingCart, 'shopping_cart')):
+            url = f'/api/recipes/{self.recipe.id}/{path}/'
+            with self.subTest(path=path):
+                response = self.client.post(url)
+                self.assertEqual(response.status_code, 201)
+                self.assertEqual(response.data['id'], self.recipe.id)
+                self.assertEqual(response.data['name'], self.recipe.name)
+                self.assertEqual(self.client.post(url).status_code, 400)
+                self.assertEqual(model.objects.filter(
+                    user=self.user, recipe=self.recipe).count(), 1)
+                self.assertEqual(self.client.delete(url).status_code, 204)
+                self.assertEqual(self.client.delete(url).status_code, 404)
+                self.assertFalse(model.objects.exists())
+
+    def test_missing_recipe(self):
+        for path in ('favorite', 'shopping_cart'):
+            url = f'/api/recipes/{self.recipe.id + 1}/{path}/'
+            with self.subTest(path=path):
+                self.assertEqual(self.client.post(url).status_code, 404)
+                self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_subscribe(self):
+        url = f'/api/users/{self.author.id}/subscribe/'
+        response = self.client.post(url)
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.data['id'], self.author.id)
+        self.assertTrue(response.data['is_subscribed'])
+        self.assertEqual(self.client.post(url).status_code, 400)
+        self.assertEqual(Subscription.objects.count(), 1)
+        self.assertEqual(self.client.delete(url).status_code, 204)
+        self.assertEqual(self.client.delete(url).status_code, 404)
+
+    def test_subscribe_to_self_or_missing_user(self):
+        self.assertEqual(self.client.post(
+            f'/api/users/{self.user.id}/subscribe/').status_code, 400)
+        self.assertEqual(self.client.post(
+            f'/api/users/{self.author.id + 1}/subscribe/').status_code, 404)
+
+    def test_added_recipe_keeps_created_date(self):
+        recipe = Favorite.objects.add(self.user.id, self.recipe.id)
+        self.assertTrue(recipe.inserted)
+        self.assertEqual(recipe.created, self.recipe.created)
+        self.assertFalse(
+            Favorite.objects.add(self.user.id, self.recipe.id).inserted)
@@ -0,0 +1,61 @@
+import os
+import tempfile
+
+from django.conf import settings
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from rest_framework.authtoken.models import Token
+from rest_framework.test import APIClient
+
+from recipes.models import AmountIngredient, Ingredient, Recipe, Tag
+from users.models import User
+
+CACHES = {'default': {
+    **settings.CACHES['default'],
+    'LOCATION': os.path.join(tempfile.gettempdir(), 'foodgram_test_cache'),
+}}
+
+
+def make_user(username):
+    return User.objects.create_user(
+        username=username, email=f'{username}@example.com',
+        password='password-12345', first_name=username, last_name=username)
+
+
+def make_client(user=None):
+    client = APIClient()
+    if user is not None:
+        token, _ = Token.objects.get_or_create(user=user)
+        client.credentials(HTTP_AUTHORIZATION=f'Token {token.key}')
+    return client
+
+
+def make_catalog(tags=3, ingredients=5):
+    return (
+        Tag.objects.bulk_create(
+            Tag(name=f'tag{i}', slug=f'tag{i}', color=f'#00000{i}')
+            for i in range(tags)),
+        Ingredient.objects.bulk_create(
+            Ingredient(name=f'ingredient{i}', measurement_unit='г')
+            for i in range(ingredients)),
+    )
+
+
+def make_recipes(author, count, tags=(), ingredients=()):
+    recipes = []
+    for number in range(count):
+        recipe = Recipe.objects.create(
+            name=f'recipe {author.username} {number}', author=author,
+            image='images/recipe.png', text='text', cooking_time=5)
+        recipe.tags.set(tags)
+        AmountIngredient.objects.bulk_create(
+            AmountIngredient(recipe=recipe, ingredient=ingredient, amount=10)
+            for ingredient in ingredients)
+        recipes.append(recipe)
+    return recipes
+
+
+@override_settings(CACHES=CACHES)
+class APITestCase(TestCase):
+    def setUp(self):
+        cache.clear()
@@ -1,48 +1,56 @@
 from django.core.exceptions import ValidationError
 
+from api.indexes import ingredient_index, tag_index
 
-def ingredients_validator(ingredients, ingredient_model):
+
+def parse_ids(ids, message):
+    try:
+        return [int(pk) for pk in ids]
+    except (TypeError, ValueError):
+        raise ValidationError(message)
+
+
+def ingredients_validator(ingredients):
     if not ingredients:
         raise ValidationError('Ингредиенты отсутствуют')
 
     validated_ingredients = {}
 
     for ingredient in ingredients:
-        if not (isinstance(ingredient['amount'], int)
-                or ingredient['amount'].isdigit()):
+        if not isinstance(ingredient, dict):
+            raise ValidationError('Некорректный формат ингредиента')
+        amount = ingredient.get('amount')
+        if not (isinstance(amount, int)
+                or isinstance(amount, str) and amount.isdigit()):
             raise ValidationError('Некорректный формат ингредиента')
 
-        validated_ingredients[ingredient['id']] = int(ingredient['amount'])
-        if validated_ingredients[ingredient['id']] <= 0:
+        pk, = parse_ids((ingredient.get('id'),),
+                        'Некорректный формат ингредиента')
+        validated_ingredients[pk] = int(amount)
+        if validated_ingredients[pk] <= 0:
             raise ValidationError('Количество должно быть больше нуля')
-        elif validated_ingredients[ingredient['id']] >= 10000:
+        elif validated_ingredients[pk] >= 10000:
             raise ValidationError('У меня столько посуды нет!')
 
-    if not validated_ingredients:
-        raise ValidationError('Корректные ингредиенты отсутствуют')
-
-    available_ingredients = ingredient_model.objects.filter(
-        pk__in=validated_ingredients.keys())
-
-    if not available_ingredients:
-        raise ValidationError('В базе не указаны доступные ингредиенты')
+    available_ingredients = ingredient_index.get_many(validated_ingredients)
 
-    for ingredient in available_ingredients:
-        validated_ingredients[ingredient.pk] = (
-            ingredient,
-            validated_ingredients[ingredient.pk]
-        )
+    if len(available_ingredients) != len(validated_ingredients):
+        raise ValidationError('Указан несуществующий ингредиент')
 
-    return validated_ingredients
+    return {
+        pk: (available_ingredients[pk], amount)
+        for pk, amount in validated_ingredients.items()
+    }
 
 
-def tags_exist_validator(tags_ids, tag):
+def tags_exist_validator(tags_ids):
     if not tags_ids:
         raise ValidationError('Теги отсутствуют')
 
-    tags = tag.objects.filter(id__in=tags_ids)
+    tags_ids = dict.fromkeys(parse_ids(tags_ids, 'Некорректный формат тега'))
+    tags = tag_index.get_many(tags_ids)
 
     if len(tags) != len(tags_ids):
         raise ValidationError('Указан несуществующий тег')
 
-    return tags
+    return list(tags.values())
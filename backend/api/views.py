@@ -1,26 +1,40 @@
 from django.contrib.auth import get_user_model
-from django.db.models import F, Sum
-from django.db.utils import IntegrityError
-from django.http import HttpResponse
-from django.shortcuts import get_object_or_404
+from django.db import transaction
+from django.db.models import (Count, F, Max, Prefetch,
+                              prefetch_related_objects)
+from django.http import StreamingHttpResponse
 from django_filters.rest_framework import DjangoFilterBackend
 from djoser.views import UserViewSet as DjoserUserViewSet
-from reportlab.pdfbase import pdfmetrics
-from reportlab.pdfbase.ttfonts import TTFont
-from reportlab.pdfgen import canvas
 from rest_framework import status
 from rest_framework.decorators import action
+from rest_framework.exceptions import NotFound
+from rest_framework.parsers import JSONParser, MultiPartParser
 from rest_framework.permissions import IsAuthenticated
+from rest_framework.renderers import JSONRenderer
 from rest_framework.response import Response
 from rest_framework.viewsets import ModelViewSet, ReadOnlyModelViewSet
 
-from api import filters, paginators, permissions, serializers
-from recipes.models import Favorite, Ingredient, Recipe, ShoppingCart, Tag
+from api import filters, paginators, permissions, renderers, serializers
+from api.cache import (USER_NAMESPACE, CachedResponseMixin,
+                       ConditionalGetMixin, get_version)
+from api.pantry import pantry_index
+from recipes.enums import NeighbourEnums
+from recipes.models import (AmountIngredient, Favorite, Ingredient, Recipe,
+                            ShoppingCart, Tag)
+from recipes.signals import user_recipes_changed
 from users.models import Subscription
+from users.signals import subscriptions_changed
 
 User = get_user_model()
 
 
+def parse_pk(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        raise NotFound
+
+
 class UserViewSet(DjoserUserViewSet):
     queryset = User.objects.all()
     serializer_class = serializers.UserSerializer
@@ -29,51 +43,133 @@ class UserViewSet(DjoserUserViewSet):
     @action(detail=True, methods=('post',),
             permission_classes=(IsAuthenticated,))
     def subscribe(self, request, **kwargs):
-        author = get_object_or_404(User, id=kwargs.get('id'))
-        Subscription.objects.create(user=request.user, author=author)
+        author_id = parse_pk(kwargs.get('id'))
+        if author_id == request.user.id:
+            return Response({'error': 'Нельзя подписаться на себя!'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        with transaction.atomic():
+            author = Subscription.objects.subscribe(request.user.id, author_id)
+            if author is None:
+                raise NotFound
+            if not author.inserted:
+                return Response({'error': 'Подписка уже существует!'},
+                                status=status.HTTP_400_BAD_REQUEST)
+            subscriptions_changed.send(
+                Subscription, user_id=request.user.id, author_id=author_id)
+        serializers.set_subscribed(request, author_id, True)
+        self._prefetch_recipes((author,), request)
         serializer = serializers.SubscriptionSerializer(
-            author, data=request.data, context={'request': request})
-        serializer.is_valid()
+            author, context={'request': request})
         return Response(serializer.data, status=status.HTTP_201_CREATED)
 
     @subscribe.mapping.delete
     def unsubscribe(self, request, **kwargs):
-        author = get_object_or_404(User, id=kwargs.get('id'))
-        subscription = get_object_or_404(
-            Subscription, user=request.user, author=author)
-        subscription.delete()
+        author_id = parse_pk(kwargs.get('id'))
+        with transaction.atomic():
+            if not Subscription.objects.unsubscribe(
+                    request.user.id, author_id):
+                return Response({'error': 'Подписка не существует!'},
+                                status=status.HTTP_404_NOT_FOUND)
+            subscriptions_changed.send(
+                Subscription, user_id=request.user.id, author_id=author_id)
+        serializers.set_subscribed(request, author_id, False)
         return Response(status=status.HTTP_204_NO_CONTENT)
 
     @action(detail=False, permission_classes=(IsAuthenticated,))
     def subscriptions(self, request):
-        queryset = User.objects.filter(subscribing__user=request.user)
+        queryset = User.objects.filter(
+            subscribing__user=request.user
+        ).annotate(
+            recipes_count=Count('recipes')
+        ).prefetch_related('groups', 'user_permissions')
         pages = self.paginate_queryset(queryset)
+        authors = pages if pages is not None else list(queryset)
+        self._prefetch_recipes(authors, request)
         serializer = serializers.SubscriptionSerializer(
-            pages, many=True, context={'request': request})
+            authors, many=True, context={'request': request})
+        if pages is None:
+            return Response(serializer.data)
         return self.get_paginated_response(serializer.data)
 
+    @staticmethod
+    def _prefetch_recipes(authors, request):
+        if not authors:
+            return
+        recipes = Recipe.objects.all()
+        limit = serializers.get_recipes_limit(request)
+        if limit:
+            recipes = recipes.first_per_author(
+                (author.id for author in authors), limit)
+        prefetch_related_objects(authors, Prefetch(
+            'recipes', queryset=recipes, to_attr='limited_recipes'))
+
 
-class TagViewSet(ReadOnlyModelViewSet):
+class TagViewSet(ConditionalGetMixin, CachedResponseMixin,
+                 ReadOnlyModelViewSet):
     queryset = Tag.objects.all()
     serializer_class = serializers.TagSerializer
     permission_classes = (permissions.IsAdminOrReadOnly,)
+    cache_namespaces = etag_namespaces = ('tags',)
 
 
-class IngredientViewSet(ReadOnlyModelViewSet):
+class IngredientViewSet(ConditionalGetMixin, CachedResponseMixin,
+                        ReadOnlyModelViewSet):
     queryset = Ingredient.objects.all()
     serializer_class = serializers.IngredientSerializer
     permission_classes = (permissions.IsAdminOrReadOnly,)
     filter_backends = (filters.IngredientFilter,)
-    search_fields = ('^name',)
+    cache_namespaces = etag_namespaces = ('ingredients',)
 
 
-class RecipeViewSet(ModelViewSet):
-    queryset = Recipe.objects.select_related('author')
+class RecipeViewSet(ConditionalGetMixin, CachedResponseMixin, ModelViewSet):
+    queryset = Recipe.objects.select_related('author').prefetch_related(
+        Prefetch('ingredient', queryset=AmountIngredient.objects
+                 .select_related('ingredient')),
+        Prefetch('tags', queryset=Tag.objects.all()),
+        'author__groups',
+        'author__user_permissions',
+    )
     serializer_class = serializers.RecipeSerializer
     permission_classes = (permissions.IsAuthorOrStaffOrReadOnly,)
+    parser_classes = (JSONParser, MultiPartParser)
     pagination_class = paginators.LimitedPagePagination
     filter_backends = (DjangoFilterBackend,)
     filterset_class = filters.RecipeFilter
+    cache_namespaces = (
+        'recipes', 'tags', 'ingredients', 'users', 'popularity')
+    etag_namespaces = ('tags', 'ingredients', 'users')
+    list_etag_namespaces = ('recipes', 'popularity')
+
+    def get_queryset(self):
+        return super().get_queryset().with_user_flags(self.request.user)
+
+    def finalize_response(self, request, response, *args, **kwargs):
+        if (self.action == 'download_shopping_cart'
+                and response.status_code >= status.HTTP_400_BAD_REQUEST):
+            request.accepted_renderer = JSONRenderer()
+            request.accepted_media_type = JSONRenderer.media_type
+        return super().finalize_response(request, response, *args, **kwargs)
+
+    def get_etag_state(self, request, kwargs):
+        state = super().get_etag_state(request, kwargs)
+        if not request.user.is_anonymous:
+            state += (get_version(USER_NAMESPACE.format(request.user.pk)),)
+        if self.action == 'retrieve':
+            return state + self._get_modification_state(kwargs)
+        return state + tuple(
+            get_version(namespace) for namespace in self.list_etag_namespaces)
+
+    def get_last_modified(self, request, kwargs):
+        if self.action == 'retrieve':
+            return self._get_modification_state(kwargs)[0]
+        return None
+
+    def _get_modification_state(self, kwargs):
+        if not hasattr(self, '_modification_state'):
+            self._modification_state = tuple(Recipe.objects.filter(
+                pk=parse_pk(kwargs.get('pk'))
+            ).aggregate(Max('updated'), Count('id')).values())
+        return self._modification_state
 
     @action(detail=True, methods=('post',),
             permission_classes=(IsAuthenticated,))
@@ -93,63 +189,140 @@ class RecipeViewSet(ModelViewSet):
     def remove_recipe_from_cart(self, request, pk):
         return self._remove_recipe(ShoppingCart, request, pk)
 
+    @action(detail=False, methods=('post',), url_path='favorite',
+            url_name='favorite-batch', permission_classes=(IsAuthenticated,))
+    def favorite_batch(self, request):
+        return self._add_recipes(Favorite, request)
+
+    @favorite_batch.mapping.delete
+    def unfavorite_batch(self, request):
+        return self._remove_recipes(Favorite, request)
+
+    @action(detail=False, methods=('post',), url_path='shopping_cart',
+            url_name='shopping-cart-batch',
+            permission_classes=(IsAuthenticated,))
+    def shopping_cart_batch(self, request):
+        return self._add_recipes(ShoppingCart, request)
+
+    @shopping_cart_batch.mapping.delete
+    def remove_recipes_from_cart(self, request):
+        return self._remove_recipes(ShoppingCart, request)
+
+    def _add_recipes(self, model, request):
+        recipe_ids = self._get_recipe_ids(request)
+        with transaction.atomic():
+            added = model.objects.add_many(request.user.id, recipe_ids)
+            created = [pk for pk, is_new in added.items() if is_new]
+            if created:
+                user_recipes_changed.send(
+                    model, user_id=request.user.id, recipe_ids=created)
+        return Response({'results': [
+            {'id': pk, 'status': (
+                'not_found' if pk not in added
+                else 'created' if added[pk] else 'exists')}
+            for pk in recipe_ids
+        ]})
+
+    def _remove_recipes(self, model, request):
+        recipe_ids = self._get_recipe_ids(request)
+        with transaction.atomic():
+            removed = model.objects.remove_many(request.user.id, recipe_ids)
+            if removed:
+                user_recipes_changed.send(
+                    model, user_id=request.user.id, recipe_ids=removed)
+        return Response({'results': [
+            {'id': pk, 'status': 'deleted' if pk in removed else 'not_found'}
+            for pk in recipe_ids
+        ]})
+
+    @staticmethod
+    def _get_recipe_ids(request):
+        serializer = serializers.RecipeIdsSerializer(data=request.data)
+        serializer.is_valid(raise_exception=True)
+        return list(dict.fromkeys(serializer.validated_data['ids']))
+
     def _remove_recipe(self, model, request, pk):
-        obj = model.objects.filter(recipe__id=pk, user=request.user).first()
-        if not obj:
-            return Response({'error': f'{model.__name__} не существует!'},
-                            status=status.HTTP_404_NOT_FOUND)
-        obj.delete()
-        return Response(status.HTTP_204_NO_CONTENT)
+        recipe_id = parse_pk(pk)
+        with transaction.atomic():
+            if not model.objects.remove(request.user.id, recipe_id):
+                return Response(
+                    {'error': f'{model.__name__} не существует!'},
+                    status=status.HTTP_404_NOT_FOUND)
+            user_recipes_changed.send(
+                model, user_id=request.user.id, recipe_ids=(recipe_id,))
+        return Response(status=status.HTTP_204_NO_CONTENT)
 
     def _add_recipe(self, model, request, pk):
-        recipe = get_object_or_404(self.queryset, pk=pk)
-        try:
-            model(recipe=recipe, user=request.user).save()
-        except IntegrityError:
-            return Response({'error': f'{model.__name__} уже существует!'})
+        recipe_id = parse_pk(pk)
+        with transaction.atomic():
+            recipe = model.objects.add(request.user.id, recipe_id)
+            if recipe is None:
+                raise NotFound
+            if not recipe.inserted:
+                return Response(
+                    {'error': f'{model.__name__} уже существует!'},
+                    status=status.HTTP_400_BAD_REQUEST)
+            user_recipes_changed.send(
+                model, user_id=request.user.id, recipe_ids=(recipe_id,))
         return Response(serializers.ShortRecipeSerializer(recipe).data,
                         status=status.HTTP_201_CREATED)
 
-    @action(methods=('get',), detail=False)
+    @action(detail=False)
+    def pantry(self, request):
+        serializer = serializers.PantrySerializer(data={
+            **request.query_params.dict(),
+            'ingredients': [
+                pk for value in request.query_params.getlist('ingredients')
+                for pk in value.split(',') if pk
+            ],
+        })
+        serializer.is_valid(raise_exception=True)
+        matches = pantry_index.match(**serializer.validated_data)
+        page = self.paginate_queryset(matches)
+        if page is None:
+            page = matches
+        recipes = self.get_queryset().in_bulk(
+            [recipe_id for recipe_id, _, _ in page])
+        data = []
+        for recipe_id, coverage, missing in page:
+            if recipe_id in recipes:
+                data.append({
+                    **self.get_serializer(recipes[recipe_id]).data,
+                    'coverage': coverage,
+                    'missing': missing,
+                })
+        if page is matches:
+            return Response(data)
+        return self.get_paginated_response(data)
+
+    @action(detail=True)
+    def similar(self, request, pk):
+        recipe_id = parse_pk(pk)
+        if not Recipe.objects.filter(pk=recipe_id).exists():
+            raise NotFound
+        recipes = Recipe.objects.filter(
+            neighbour_of__recipe=recipe_id
+        ).annotate(score=F('neighbour_of__score')).order_by('-score', 'id')
+        return Response([
+            {**serializers.ShortRecipeSerializer(recipe).data,
+             'score': round(recipe.score, 4)}
+            for recipe in recipes[:NeighbourEnums.TOP_K]
+        ])
+
+    @action(methods=('get',), detail=False,
+            permission_classes=(IsAuthenticated,),
+            renderer_classes=renderers.SHOPPING_LIST_RENDERERS)
     def download_shopping_cart(self, request):
         user = self.request.user
         if not user.shopping_cart.exists():
-            return Response(status=status.HTTP_400_BAD_REQUEST)
-        shopping_list = (
-            f'{ingredient["name"]}: '
-            f'{ingredient["amount"]} '
-            f'{ingredient["measurement"]}'
-            for ingredient in Ingredient.objects.filter(
-                recipe__recipe__in_carts__user=user
-            ).values('name', measurement=F('measurement_unit'))
-            .annotate(amount=Sum('recipe__amount'))
-        )
-        return self.__shopping_list_to_pdf(shopping_list)
-
-    @staticmethod
-    def __shopping_list_to_pdf(shopping_list, font='Westhorn'):
-        pdfmetrics.registerFont(TTFont(font, f'data/{font}.ttf', 'UTF-8'))
-        response = HttpResponse(content_type='application/pdf')
-        response['Content-Disposition'] = (
-            'attachment;  filename=shopping_list.pdf')
-
-        page = canvas.Canvas(response)
-        height = 800
-        page.setFont(font, size=24)
-        page.drawString(200, height, 'Список покупок')
-        height -= 50
-        page.setFont(font, size=16)
-        for ingredient in shopping_list:
-            page.drawString(75, height, ingredient)
-            height -= 25
-        page.showPage()
-        page.save()
-        return response
-
-    @staticmethod
-    def __shopping_list_to_txt(shopping_list):
-        response = HttpResponse('\n'.join(shopping_list),
-                                content_type='text.txt; charset=utf-8')
+            return Response({'error': 'Корзина пуста!'},
+                            status=status.HTTP_400_BAD_REQUEST)
+        items = user.shopping_list.order_by('ingredient__name').values_list(
+            'ingredient__name', 'total_amount', 'ingredient__measurement_unit'
+        ).iterator()
+        renderer = request.accepted_renderer
+        response = StreamingHttpResponse(
+            renderer.export(items), content_type=renderer.content_type)
         response['Content-Disposition'] = (
-            'attachment; filename=shopping_list.txt')
+            f'attachment; filename=shopping_list.{renderer.format}')
         return response
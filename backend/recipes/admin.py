@@ -1,4 +1,5 @@
 from django.contrib import admin
+from django.db.models import Count
 
 from recipes import models, forms
 
@@ -10,7 +11,9 @@ class IngredientInline(admin.TabularInline):
 
 @admin.register(models.Recipe)
 class RecipeAdmin(admin.ModelAdmin):
-    list_display = ('name', 'id', 'author', 'added_in_favorites')
+    list_display = ('name', 'id', 'author', 'added_in_favorites',
+                    'popularity', 'trending')
+    list_select_related = ('author',)
     readonly_fields = ('added_in_favorites',)
     list_filter = ('author', 'name')
     exclude = ('ingredients',)
@@ -19,9 +22,14 @@ class RecipeAdmin(admin.ModelAdmin):
     filter_horizontal = ('tags',)
     inlines = (IngredientInline,)
 
-    @admin.display(description='Количество добавлений в избранное')
+    def get_queryset(self, request):
+        return super().get_queryset(request).annotate(
+            favorites_count=Count('in_favorite'))
+
+    @admin.display(description='Количество добавлений в избранное',
+                   ordering='favorites_count')
     def added_in_favorites(self, recipe):
-        return recipe.in_favorite.count()
+        return recipe.favorites_count
 
 
 @admin.register(models.Ingredient)
@@ -39,14 +47,19 @@ class TagAdmin(admin.ModelAdmin):
 
 @admin.register(models.ShoppingCart)
 class ShoppingCartAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe')
+    list_display = ('user', 'recipe', 'created')
 
 
 @admin.register(models.Favorite)
 class FavouriteAdmin(admin.ModelAdmin):
-    list_display = ('user', 'recipe')
+    list_display = ('user', 'recipe', 'created')
 
 
 @admin.register(models.AmountIngredient)
 class AmountIngredientAdmin(admin.ModelAdmin):
     list_display = ('recipe', 'ingredient', 'amount')
+
+
+@admin.register(models.ShoppingListItem)
+class ShoppingListItemAdmin(admin.ModelAdmin):
+    list_display = ('user', 'ingredient', 'total_amount')
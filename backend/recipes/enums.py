@@ -23,3 +23,20 @@ class AmountIngredientEnums(IntEnum):
     AMOUNT_DEFAULT_VALUE = 1
     AMOUNT_MIN_VALUE = 1
     AMOUNT_MAX_VALUE = 10000
+
+
+class RecipeImageEnums(IntEnum):
+    THUMBNAIL_WIDTH = 480
+    THUMBNAIL_HEIGHT = 360
+    QUALITY = 80
+    GC_GRACE_MINUTES = 60
+
+
+class NeighbourEnums(IntEnum):
+    TOP_K = 10
+    CHUNK_SIZE = 256
+
+
+class PopularityEnums(IntEnum):
+    TRENDING_HALF_LIFE_HOURS = 72
+    TRENDING_WINDOW_DAYS = 30
@@ -0,0 +1,48 @@
+import os
+from io import BytesIO
+
+from django.core.files.base import ContentFile
+from PIL import Image, ImageOps
+
+from recipes.enums import RecipeImageEnums
+
+THUMBNAIL_SIZE = (RecipeImageEnums.THUMBNAIL_WIDTH,
+                  RecipeImageEnums.THUMBNAIL_HEIGHT)
+VARIANT_FIELDS = ('image_webp', 'thumbnail', 'thumbnail_webp')
+
+
+def encode(image, image_format, name):
+    buffer = BytesIO()
+    image.save(buffer, image_format, quality=RecipeImageEnums.QUALITY)
+    return ContentFile(buffer.getvalue(), name=name)
+
+
+def make_variants(image_file):
+    stem = os.path.splitext(os.path.basename(image_file.name))[0]
+    image_file.open('rb')
+    try:
+        with Image.open(image_file) as image:
+            image = ImageOps.exif_transpose(image).convert('RGB')
+    finally:
+        image_file.close()
+    thumbnail = ImageOps.fit(image, THUMBNAIL_SIZE, Image.LANCZOS)
+    return {
+        'image_webp': encode(image, 'WEBP', f'{stem}.webp'),
+        'thumbnail': encode(thumbnail, 'JPEG', f'{stem}.jpg'),
+        'thumbnail_webp': encode(thumbnail, 'WEBP', f'{stem}.webp'),
+    }
+
+
+def save_variants(recipe):
+    variants = {}
+    for field, content in make_variants(recipe.image).items():
+        getattr(recipe, field).save(content.name, content, save=False)
+        variants[field] = getattr(recipe, field).name
+    type(recipe).objects.filter(pk=recipe.pk).update(**variants)
+
+
+def clear_variants(recipe):
+    variants = {field: '' for field in VARIANT_FIELDS}
+    for field, name in variants.items():
+        setattr(recipe, field, name)
+    type(recipe).objects.filter(pk=recipe.pk).update(**variants)
@@ -0,0 +1,26 @@
+from django.core.management.base import BaseCommand
+
+from recipes.enums import NeighbourEnums
+from recipes.neighbours import rebuild_neighbours
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает похожие рецепты по ингредиентам и тегам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--full', action='store_true',
+            help='Пересчитать все рецепты, а не только изменённые')
+        parser.add_argument(
+            '--top', type=int, default=NeighbourEnums.TOP_K,
+            help='Сколько похожих рецептов хранить для каждого рецепта')
+        parser.add_argument(
+            '--chunk-size', type=int, default=NeighbourEnums.CHUNK_SIZE,
+            help='Сколько рецептов сравнивать за один проход')
+
+    def handle(self, *args, **options):
+        recipes, neighbours = rebuild_neighbours(
+            full=options['full'], k=options['top'],
+            chunk_size=options['chunk_size'])
+        self.stdout.write(self.style.SUCCESS(
+            f'Пересчитано рецептов: {recipes}, связей: {neighbours}'))
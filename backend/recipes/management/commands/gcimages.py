@@ -0,0 +1,61 @@
+import os
+from datetime import timedelta
+from functools import reduce
+from operator import or_
+
+from django.core.management.base import BaseCommand
+from django.db.models import Q
+from django.utils import timezone
+
+from recipes.enums import RecipeImageEnums
+from recipes.models import Recipe, content_storage
+
+IMAGE_FIELDS = ('image', 'image_webp', 'thumbnail', 'thumbnail_webp')
+
+
+class Command(BaseCommand):
+    help = 'Удаляет файлы изображений, на которые не ссылается ни один рецепт'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help='Только показать, какие файлы будут удалены')
+        parser.add_argument(
+            '--grace', type=int, default=RecipeImageEnums.GC_GRACE_MINUTES,
+            help='Не трогать файлы моложе указанного числа минут')
+
+    @staticmethod
+    def is_in_use(name, deadline):
+        return (content_storage.get_modified_time(name) > deadline
+                or Recipe.objects.filter(reduce(or_, (
+                    Q(**{field: name}) for field in IMAGE_FIELDS
+                ))).exists())
+
+    def handle(self, *args, **options):
+        references = {}
+        for row in Recipe.objects.values_list(*IMAGE_FIELDS).iterator():
+            for name in filter(None, row):
+                references[name] = references.get(name, 0) + 1
+        deadline = timezone.now() - timedelta(minutes=options['grace'])
+        removed = kept = 0
+        root = os.path.commonpath([
+            Recipe._meta.get_field(field).upload_to for field in IMAGE_FIELDS
+        ])
+        if not content_storage.exists(root):
+            return
+        for name in content_storage.blobs(root):
+            if (references.get(name)
+                    or content_storage.get_modified_time(name) > deadline):
+                kept += 1
+                continue
+            if options['dry_run']:
+                self.stdout.write(name)
+            elif self.is_in_use(name, deadline):
+                kept += 1
+                continue
+            else:
+                content_storage.delete(name)
+            removed += 1
+        self.stdout.write(self.style.SUCCESS(
+            f'Удалено файлов: {removed}, используется или свежих: {kept}'
+            + (' (пробный запуск)' if options['dry_run'] else '')))
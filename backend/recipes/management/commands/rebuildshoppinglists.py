@@ -0,0 +1,32 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from recipes.models import ShoppingListItem
+
+
+class Command(BaseCommand):
+    help = 'Пересобирает и сверяет списки покупок с корзинами'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--verify', action='store_true',
+            help='Только сверить списки покупок, ничего не меняя')
+
+    def handle(self, *args, **options):
+        if not options['verify']:
+            ShoppingListItem.objects.refresh()
+            self.stdout.write('Списки покупок пересобраны')
+        live = ShoppingListItem.objects.live_totals()
+        stored = {
+            (item['user'], item['ingredient']): item['total_amount']
+            for item in ShoppingListItem.objects.values(
+                'user', 'ingredient', 'total_amount')
+        }
+        mismatches = {
+            key for key in live.keys() | stored.keys()
+            if live.get(key) != stored.get(key)
+        }
+        if mismatches:
+            raise CommandError(
+                f'Расхождений в списках покупок: {len(mismatches)}')
+        self.stdout.write(self.style.SUCCESS(
+            f'Списки покупок совпадают с корзинами, строк: {len(stored)}'))
@@ -0,0 +1,31 @@
+from datetime import timedelta
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from recipes.enums import PopularityEnums
+from recipes.models import Recipe
+from recipes.signals import popularity_updated
+
+
+class Command(BaseCommand):
+    help = 'Пересчитывает популярность рецептов по избранному и корзинам'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--half-life', type=int,
+            default=PopularityEnums.TRENDING_HALF_LIFE_HOURS,
+            help='За сколько часов вклад добавления в тренд падает вдвое')
+        parser.add_argument(
+            '--window', type=int,
+            default=PopularityEnums.TRENDING_WINDOW_DAYS,
+            help='За сколько последних дней учитывать добавления в тренде')
+
+    def handle(self, *args, half_life, window, **options):
+        updated = Recipe.objects.update_popularity(
+            timezone.now(), timedelta(hours=half_life),
+            timedelta(days=window))
+        if updated:
+            popularity_updated.send(sender=Recipe)
+        self.stdout.write(self.style.SUCCESS(
+            f'Популярность пересчитана, обновлено рецептов: {updated}'))
@@ -1,12 +1,77 @@
+import csv
 import json
+from itertools import islice
+from pathlib import Path
 
-from django.core.management.base import BaseCommand
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
 
 from recipes.models import Ingredient
+from recipes.signals import ingredients_imported
+
+CHUNK_SIZE = 64 * 1024
+JSON_SEPARATORS = ' \t\r\n[],'
+
+
+def read_json(file):
+    decoder = json.JSONDecoder()
+    buffer, position = '', 0
+    for chunk in iter(lambda: file.read(CHUNK_SIZE), ''):
+        buffer, position = buffer[position:] + chunk, 0
+        while True:
+            while (position < len(buffer)
+                   and buffer[position] in JSON_SEPARATORS):
+                position += 1
+            if position == len(buffer):
+                break
+            try:
+                item, position = decoder.raw_decode(buffer, position)
+            except json.JSONDecodeError:
+                break
+            yield item
+    if buffer[position:].strip(JSON_SEPARATORS):
+        raise CommandError('Файл с ингредиентами повреждён')
+
+
+def read_csv(file):
+    for name, measurement_unit in csv.reader(file):
+        yield {'name': name, 'measurement_unit': measurement_unit}
+
+
+READERS = {'json': read_json, 'csv': read_csv}
 
 
 class Command(BaseCommand):
-    def handle(self, *args, **options):
-        with open('data/ingredients.json', encoding='utf-8') as data:
-            for ingredients in json.loads(data.read()):
-                Ingredient.objects.get_or_create(**ingredients)
+    help = 'Загружает ингредиенты из JSON или CSV файла'
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            'path', nargs='?', type=Path,
+            default=settings.BASE_DIR / 'data' / 'ingredients.json',
+            help='Путь к файлу с ингредиентами')
+        parser.add_argument(
+            '--format', choices=READERS.keys(),
+            help='Формат файла, по умолчанию определяется по расширению')
+        parser.add_argument(
+            '--batch-size', type=int, default=1000,
+            help='Количество ингредиентов в одном INSERT')
+
+    def handle(self, *args, path, batch_size, **options):
+        file_format = options['format'] or path.suffix.lstrip('.').lower()
+        if file_format not in READERS:
+            raise CommandError(f'Неизвестный формат файла: {path}')
+        processed = inserted = 0
+        with open(path, encoding='utf-8') as file, transaction.atomic():
+            rows = READERS[file_format](file)
+            while batch := list(islice(rows, batch_size)):
+                processed += len(batch)
+                inserted += Ingredient.objects.insert_missing(batch)
+                self.stdout.write(
+                    f'Обработано: {processed}, добавлено: {inserted}, '
+                    f'пропущено: {processed - inserted}')
+        if inserted:
+            ingredients_imported.send(sender=Ingredient)
+        self.stdout.write(self.style.SUCCESS(
+            f'Загрузка завершена. Добавлено: {inserted}, '
+            f'пропущено: {processed - inserted}'))
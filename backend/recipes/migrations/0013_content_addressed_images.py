@@ -0,0 +1,34 @@
+# Generated by Django 3.2.16 on 2026-10-18 20:35
+
+from django.db import migrations, models
+import recipes.storage
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('recipes', '0012_recipe_image_variants'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='recipe',
+            name='image',
+            field=models.ImageField(storage=recipes.storage.ContentAddressedStorage(), upload_to='images/', verbose_name='Изображение'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='image_webp',
+            field=models.ImageField(blank=True, editable=False, storage=recipes.storage.ContentAddressedStorage(), upload_to='images/webp/', verbose_name='Изображение WebP'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='thumbnail',
+            field=models.ImageField(blank=True, editable=False, storage=recipes.storage.ContentAddressedStorage(), upload_to='images/thumbnails/', verbose_name='Миниатюра'),
+        ),
+        migrations.AlterField(
+            model_name='recipe',
+            name='thumbnail_webp',
+            field=models.ImageField(blank=True, editable=False, storage=recipes.storage.ContentAddressedStorage(), upload_to='images/thumbnails/', verbose_name='Миниатюра WebP'),
+        ),
+    ]
@@ -0,0 +1,46 @@
+import django.contrib.postgres.indexes
+import django.contrib.postgres.search
+from django.contrib.postgres.operations import AddIndexConcurrently
+from django.db import migrations
+
+SEARCH_VECTOR = (
+    "setweight(to_tsvector('russian', coalesce({row}name, '')), 'A')"
+    " || setweight(to_tsvector('russian', coalesce({row}text, '')), 'B')"
+)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        ('recipes', '0013_content_addressed_images'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='recipe',
+            name='search_vector',
+            field=django.contrib.postgres.search.SearchVectorField(editable=False, null=True, verbose_name='Поисковый вектор'),
+        ),
+        migrations.RunSQL(
+            'CREATE FUNCTION recipes_recipe_search_vector() RETURNS trigger'
+            ' LANGUAGE plpgsql AS $$ BEGIN'
+            f' NEW.search_vector := {SEARCH_VECTOR.format(row="NEW.")};'
+            ' RETURN NEW; END $$;'
+            ' CREATE TRIGGER recipes_recipe_search_vector'
+            ' BEFORE INSERT OR UPDATE OF name, text ON recipes_recipe'
+            ' FOR EACH ROW EXECUTE FUNCTION recipes_recipe_search_vector()',
+            'DROP TRIGGER recipes_recipe_search_vector ON recipes_recipe;'
+            ' DROP FUNCTION recipes_recipe_search_vector()',
+        ),
+        migrations.RunSQL(
+            'UPDATE recipes_recipe'
+            f' SET search_vector = {SEARCH_VECTOR.format(row="")}',
+            migrations.RunSQL.noop,
+        ),
+        AddIndexConcurrently(
+            model_name='recipe',
+            index=django.contrib.postgres.indexes.GinIndex(fields=['search_vector'], name='recipe_search_idx'),
+        ),
+    ]
@@ -0,0 +1,43 @@
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+INDEXES = (
+    ('recipes_favorite', 'recipes_favorite_user_id_dd4f6854'),
+    ('recipes_shoppingcart', 'recipes_shoppingcart_user_id_9cf94f11'),
+)
+
+
+class Migration(migrations.Migration):
+
+    atomic = False
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('recipes', '0016_recipe_popularity'),
+    ]
+
+    operations = [
+        migrations.SeparateDatabaseAndState(
+            database_operations=[
+                migrations.RunSQL(
+                    f'DROP INDEX CONCURRENTLY IF EXISTS {index}',
+                    f'CREATE INDEX CONCURRENTLY IF NOT EXISTS {index}'
+                    f' ON {table} (user_id)',
+                )
+                for table, index in INDEXES
+            ],
+            state_operations=[
+                migrations.AlterField(
+                    model_name='favorite',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='favorite_recipies', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+                ),
+                migrations.AlterField(
+                    model_name='shoppingcart',
+                    name='user',
+                    field=models.ForeignKey(db_index=False, on_delete=django.db.models.deletion.CASCADE, related_name='shopping_cart', to=settings.AUTH_USER_MODEL, verbose_name='Пользователь'),
+                ),
+            ],
+        ),
+    ]
@@ -1,12 +1,23 @@
 from colorfield.fields import ColorField
 from django.contrib.auth import get_user_model
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import (SearchQuery, SearchRank,
+                                            SearchVectorField)
 from django.core import validators
-from django.db import models
+from django.db import connection, models, transaction
+from django.db.models.expressions import RawSQL
+from django.db.models.functions import Cast
+from django.utils import timezone
 
 from recipes import enums
+from recipes.storage import ContentAddressedStorage
 
 User = get_user_model()
 
+content_storage = ContentAddressedStorage()
+
+SEARCH_CONFIG = 'russian'
+
 
 class Tag(models.Model):
     name = models.CharField(
@@ -36,6 +47,19 @@ class Tag(models.Model):
         return self.slug
 
 
+class IngredientQuerySet(models.QuerySet):
+    def insert_missing(self, rows):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.model._meta.db_table}'
+                ' (name, measurement_unit)'
+                ' SELECT * FROM unnest(%s::varchar[], %s::varchar[])'
+                ' ON CONFLICT DO NOTHING',
+                ([row['name'] for row in rows],
+                 [row['measurement_unit'] for row in rows]))
+            return cursor.rowcount
+
+
 class Ingredient(models.Model):
     name = models.CharField(
         'Ингредиент',
@@ -46,6 +70,8 @@ class Ingredient(models.Model):
         max_length=enums.IngredientEnums.MEASUREMENT_UNIT_MAX_LEN
     )
 
+    objects = IngredientQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Ингредиент',
         verbose_name_plural = 'Ингредиенты'
@@ -61,6 +87,75 @@ class Ingredient(models.Model):
         return f'{self.name} {self.measurement_unit}'
 
 
+class RecipeQuerySet(models.QuerySet):
+    def touch(self):
+        return self.update(updated=timezone.now())
+
+    def update_popularity(self, now, half_life, window):
+        recipes = self.model._meta.db_table
+        tables = [model._meta.db_table for model in (Favorite, ShoppingCart)]
+        events = ' UNION ALL '.join(
+            f'SELECT recipe_id FROM {table}' for table in tables)
+        recent = ' UNION ALL '.join(
+            f'SELECT recipe_id, created FROM {table} WHERE created >= %s'
+            for table in tables)
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'WITH totals AS ('
+                f' SELECT recipe_id, count(*) AS popularity FROM ({events})'
+                ' AS events GROUP BY recipe_id'
+                '), trends AS ('
+                ' SELECT recipe_id, sum(power(0.5,'
+                ' extract(epoch FROM %s - created) / %s)) AS trending'
+                f' FROM ({recent}) AS recent GROUP BY recipe_id'
+                f') UPDATE {recipes} SET'
+                ' popularity = coalesce(totals.popularity, 0),'
+                ' trending = coalesce(trends.trending, 0)'
+                f' FROM {recipes} AS recipe'
+                ' LEFT JOIN totals ON totals.recipe_id = recipe.id'
+                ' LEFT JOIN trends ON trends.recipe_id = recipe.id'
+                f' WHERE {recipes}.id = recipe.id'
+                f' AND ({recipes}.popularity, {recipes}.trending)'
+                ' IS DISTINCT FROM (coalesce(totals.popularity, 0),'
+                ' coalesce(trends.trending, 0))',
+                (now, half_life.total_seconds(),
+                 *(now - window for _ in tables)))
+            return cursor.rowcount
+
+    def search(self, text):
+        query = SearchQuery(
+            text, config=SEARCH_CONFIG, search_type='websearch')
+        return self.filter(search_vector=query).annotate(
+            rank=Cast(SearchRank(models.F('search_vector'), query),
+                      models.FloatField())
+        ).order_by('-rank', 'name', 'id')
+
+    def with_user_flags(self, user):
+        if user.is_anonymous:
+            return self
+        return self.annotate(
+            is_favorited=models.Exists(Favorite.objects.filter(
+                recipe=models.OuterRef('pk'), user=user)),
+            is_in_shopping_cart=models.Exists(ShoppingCart.objects.filter(
+                recipe=models.OuterRef('pk'), user=user)),
+        )
+
+    def first_per_author(self, author_ids, limit):
+        return self.filter(pk__in=RawSQL(
+            'SELECT id FROM ('
+            ' SELECT id, ROW_NUMBER() OVER ('
+            '  PARTITION BY author_id ORDER BY name, id) AS position'
+            f' FROM {self.model._meta.db_table} WHERE author_id = ANY(%s)'
+            ') AS ranked WHERE position <= %s',
+            (list(author_ids), limit),
+        ))
+
+
+class RecipeManager(models.Manager.from_queryset(RecipeQuerySet)):
+    def get_queryset(self):
+        return super().get_queryset().defer('search_vector')
+
+
 class Recipe(models.Model):
     name = models.CharField(
         'Название',
@@ -89,7 +184,32 @@ class Recipe(models.Model):
         related_name='recipes',
         verbose_name='Ингредиенты',
     )
-    image = models.ImageField('Изображение', upload_to='images/')
+    image = models.ImageField(
+        'Изображение',
+        upload_to='images/',
+        storage=content_storage,
+    )
+    image_webp = models.ImageField(
+        'Изображение WebP',
+        upload_to='images/webp/',
+        storage=content_storage,
+        blank=True,
+        editable=False,
+    )
+    thumbnail = models.ImageField(
+        'Миниатюра',
+        upload_to='images/thumbnails/',
+        storage=content_storage,
+        blank=True,
+        editable=False,
+    )
+    thumbnail_webp = models.ImageField(
+        'Миниатюра WebP',
+        upload_to='images/thumbnails/',
+        storage=content_storage,
+        blank=True,
+        editable=False,
+    )
     text = models.TextField(
         'Описание',
         max_length=enums.RecipeEnums.TEXT_MAX_LEN
@@ -98,6 +218,33 @@ class Recipe(models.Model):
         'Время приготовления',
         default=enums.RecipeEnums.COOKING_TIME_DEFAULT_VALUE,
     )
+    created = models.DateTimeField(
+        'Дата создания',
+        auto_now_add=True,
+        db_index=True,
+    )
+    updated = models.DateTimeField(
+        'Дата изменения',
+        auto_now=True,
+        db_index=True,
+    )
+    search_vector = SearchVectorField(
+        'Поисковый вектор',
+        null=True,
+        editable=False,
+    )
+    popularity = models.PositiveIntegerField(
+        'Популярность',
+        default=0,
+        editable=False,
+    )
+    trending = models.FloatField(
+        'Популярность за последнее время',
+        default=0,
+        editable=False,
+    )
+
+    objects = RecipeManager()
 
     class Meta:
         verbose_name = 'Рецепт'
@@ -109,11 +256,29 @@ class Recipe(models.Model):
                 name='recipe_duplication_constraint',
             ),
         )
+        indexes = (
+            models.Index(fields=('name', 'id'), name='recipe_name_id_idx'),
+            GinIndex(fields=('search_vector',), name='recipe_search_idx'),
+            models.Index(fields=('-popularity', 'id'),
+                         name='recipe_popularity_idx'),
+            models.Index(fields=('-trending', 'id'),
+                         name='recipe_trending_idx'),
+        )
 
     def __str__(self):
         return f'"{self.name}". Автор: {self.author}'
 
 
+class AmountIngredientQuerySet(models.QuerySet):
+    def remove(self, recipe_id, ingredient_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.model._meta.db_table}'
+                ' WHERE recipe_id = %s AND ingredient_id = ANY(%s)',
+                (recipe_id, list(ingredient_ids)))
+            return cursor.rowcount
+
+
 class AmountIngredient(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -142,6 +307,8 @@ class AmountIngredient(models.Model):
         )
     )
 
+    objects = AmountIngredientQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Количество ингредиента'
         verbose_name_plural = 'Количество ингредиентов'
@@ -158,6 +325,56 @@ class AmountIngredient(models.Model):
                 f' {self.amount} {self.ingredient.measurement_unit}')
 
 
+class UserRecipeQuerySet(models.QuerySet):
+    def add(self, user_id, recipe_id):
+        recipes = Recipe._meta.db_table
+        return next(iter(Recipe.objects.raw(
+            'WITH inserted AS ('
+            f' INSERT INTO {self.model._meta.db_table}'
+            ' (user_id, recipe_id, created)'
+            f' SELECT %s, id, now() FROM {recipes} WHERE id = %s'
+            ' ON CONFLICT DO NOTHING RETURNING id'
+            ') SELECT id, name, image, thumbnail, thumbnail_webp,'
+            ' cooking_time, EXISTS (SELECT 1 FROM inserted) AS inserted'
+            f' FROM {recipes} WHERE id = %s',
+            (user_id, recipe_id, recipe_id),
+        )), None)
+
+    def remove(self, user_id, recipe_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.model._meta.db_table}'
+                ' WHERE user_id = %s AND recipe_id = %s RETURNING id',
+                (user_id, recipe_id))
+            return cursor.fetchone() is not None
+
+    def add_many(self, user_id, recipe_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'WITH requested AS ('
+                f' SELECT id FROM {Recipe._meta.db_table}'
+                ' WHERE id = ANY(%s)'
+                '), inserted AS ('
+                f' INSERT INTO {self.model._meta.db_table}'
+                ' (user_id, recipe_id, created)'
+                ' SELECT %s, id, now() FROM requested'
+                ' ON CONFLICT DO NOTHING RETURNING recipe_id'
+                ') SELECT requested.id, inserted.recipe_id IS NOT NULL'
+                ' FROM requested LEFT JOIN inserted'
+                ' ON inserted.recipe_id = requested.id',
+                (list(recipe_ids), user_id))
+            return dict(cursor.fetchall())
+
+    def remove_many(self, user_id, recipe_ids):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.model._meta.db_table}'
+                ' WHERE user_id = %s AND recipe_id = ANY(%s)'
+                ' RETURNING recipe_id',
+                (user_id, list(recipe_ids)))
+            return {recipe_id for recipe_id, in cursor.fetchall()}
+
+
 class Favorite(models.Model):
     recipe = models.ForeignKey(
         Recipe,
@@ -170,8 +387,15 @@ class Favorite(models.Model):
         models.CASCADE,
         related_name='favorite_recipies',
         verbose_name='Пользователь',
+        db_index=False,
+    )
+    created = models.DateTimeField(
+        'Дата добавления',
+        default=timezone.now,
     )
 
+    objects = UserRecipeQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Избранный рецепт'
         verbose_name_plural = 'Избранные рецепты'
@@ -182,6 +406,11 @@ class Favorite(models.Model):
                 name='unique_favorites_constraint',
             ),
         )
+        indexes = (
+            models.Index(fields=('user', 'recipe'),
+                         name='favorite_user_recipe_idx'),
+            models.Index(fields=('created',), name='favorite_created_idx'),
+        )
 
     def __str__(self):
         return f'{self.recipe} <- {self.user}'
@@ -199,7 +428,14 @@ class ShoppingCart(models.Model):
         models.CASCADE,
         related_name='shopping_cart',
         verbose_name='Пользователь',
+        db_index=False,
     )
+    created = models.DateTimeField(
+        'Дата добавления',
+        default=timezone.now,
+    )
+
+    objects = UserRecipeQuerySet.as_manager()
 
     class Meta:
         verbose_name = 'Рецепт в списке покупок'
@@ -211,6 +447,139 @@ class ShoppingCart(models.Model):
                 name='unique_recipe_in_cart_constraint',
             ),
         )
+        indexes = (
+            models.Index(fields=('user', 'recipe'),
+                         name='cart_user_recipe_idx'),
+            models.Index(fields=('created',), name='cart_created_idx'),
+        )
 
     def __str__(self):
         return f'{self.recipe} <- {self.user}'
+
+
+class ShoppingListQuerySet(models.QuerySet):
+    def live_totals(self, user_ids=None, ingredient_ids=None):
+        amounts = AmountIngredient.objects.all()
+        if user_ids is None:
+            amounts = amounts.filter(recipe__in_carts__isnull=False)
+        else:
+            amounts = amounts.filter(recipe__in_carts__user__in=user_ids)
+        if ingredient_ids is not None:
+            amounts = amounts.filter(ingredient__in=ingredient_ids)
+        return {
+            (row['user'], row['ingredient']): row['total_amount']
+            for row in amounts.values(
+                'ingredient', user=models.F('recipe__in_carts__user')
+            ).annotate(total_amount=models.Sum('amount')).order_by()
+        }
+
+    def refresh(self, user_ids=None, ingredient_ids=None):
+        items = self.select_for_update()
+        if user_ids is not None:
+            items = items.filter(user__in=user_ids)
+        if ingredient_ids is not None:
+            items = items.filter(ingredient__in=ingredient_ids)
+        users = User.objects.select_for_update(no_key=True)
+        if user_ids is not None:
+            users = users.filter(pk__in=user_ids)
+        with transaction.atomic():
+            list(users.order_by('pk').values_list('pk', flat=True))
+            totals = self.live_totals(user_ids, ingredient_ids)
+            stale, changed = [], []
+            for item in items:
+                total = totals.pop((item.user_id, item.ingredient_id), None)
+                if total is None:
+                    stale.append(item.pk)
+                elif total != item.total_amount:
+                    item.total_amount = total
+                    changed.append(item)
+            self.filter(pk__in=stale).delete()
+            self.bulk_update(changed, ('total_amount',))
+            self.bulk_create(
+                self.model(user_id=user_id, ingredient_id=ingredient_id,
+                           total_amount=total)
+                for (user_id, ingredient_id), total in totals.items())
+
+    def refresh_for_recipe(self, recipe_id, ingredient_ids=None):
+        self.refresh(
+            ShoppingCart.objects.filter(recipe_id=recipe_id).values('user'),
+            ingredient_ids)
+
+
+class ShoppingListItem(models.Model):
+    user = models.ForeignKey(
+        User,
+        models.CASCADE,
+        related_name='shopping_list',
+        verbose_name='Пользователь',
+    )
+    ingredient = models.ForeignKey(
+        Ingredient,
+        models.CASCADE,
+        related_name='in_shopping_lists',
+        verbose_name='Ингредиент',
+    )
+    total_amount = models.PositiveIntegerField('Общее количество')
+
+    objects = ShoppingListQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Ингредиент в списке покупок'
+        verbose_name_plural = 'Ингредиенты в списке покупок'
+        ordering = ('user', 'ingredient')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('user', 'ingredient'),
+                name='unique_shopping_list_item_constraint',
+            ),
+        )
+
+    def __str__(self):
+        return (f'{self.user}: {self.ingredient.name}'
+                f' {self.total_amount} {self.ingredient.measurement_unit}')
+
+
+class RecipeNeighbourQuerySet(models.QuerySet):
+    def store(self, recipe_ids, neighbour_ids, scores, computed):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {self.model._meta.db_table}'
+                ' (recipe_id, neighbour_id, score, computed)'
+                ' SELECT recipe_id, neighbour_id, score, %s FROM unnest('
+                '%s::bigint[], %s::bigint[], %s::double precision[]'
+                ') AS rows (recipe_id, neighbour_id, score)',
+                (computed, list(recipe_ids), list(neighbour_ids),
+                 list(scores)))
+
+
+class RecipeNeighbour(models.Model):
+    recipe = models.ForeignKey(
+        Recipe,
+        models.CASCADE,
+        related_name='neighbours',
+        verbose_name='Рецепт',
+    )
+    neighbour = models.ForeignKey(
+        Recipe,
+        models.CASCADE,
+        related_name='neighbour_of',
+        verbose_name='Похожий рецепт',
+    )
+    score = models.FloatField('Сходство')
+    computed = models.DateTimeField('Дата расчёта')
+
+    objects = RecipeNeighbourQuerySet.as_manager()
+
+    class Meta:
+        verbose_name = 'Похожий рецепт'
+        verbose_name_plural = 'Похожие рецепты'
+        ordering = ('recipe', '-score')
+        constraints = (
+            models.UniqueConstraint(
+                fields=('recipe', 'neighbour'),
+                name='unique_recipe_neighbour_constraint',
+            ),
+        )
+
+    def __str__(self):
+        return f'{self.recipe} ~ {self.neighbour}: {self.score:.2f}'
@@ -0,0 +1,120 @@
+import numpy as np
+from django.db import models, transaction
+from django.utils import timezone
+from scipy import sparse
+
+from recipes.enums import NeighbourEnums
+from recipes.models import AmountIngredient, Recipe, RecipeNeighbour
+
+
+def fetch_pairs(queryset, *fields):
+    return np.array(
+        list(queryset.values_list(*fields).order_by().iterator()),
+        np.int64).reshape(-1, 2)
+
+
+def build_matrix():
+    recipe_ids = np.array(
+        Recipe.objects.order_by('id').values_list('id', flat=True), np.int64)
+    ingredients = fetch_pairs(
+        AmountIngredient.objects.all(), 'recipe_id', 'ingredient_id')
+    tags = fetch_pairs(
+        Recipe.tags.through.objects.all(), 'recipe_id', 'tag_id')
+    _, ingredient_columns = np.unique(ingredients[:, 1], return_inverse=True)
+    _, tag_columns = np.unique(tags[:, 1], return_inverse=True)
+    offset = ingredient_columns.max(initial=-1) + 1
+    rows = np.searchsorted(
+        recipe_ids, np.concatenate((ingredients[:, 0], tags[:, 0])))
+    columns = np.concatenate((ingredient_columns, tag_columns + offset))
+    matrix = sparse.csr_matrix(
+        (np.ones(len(rows), np.float32), (rows, columns)),
+        shape=(len(recipe_ids), offset + tag_columns.max(initial=-1) + 1))
+    matrix.data[:] = 1
+    frequency = np.bincount(matrix.indices, minlength=matrix.shape[1])
+    idf = np.log((1 + len(recipe_ids)) / (1 + frequency)) + 1
+    matrix = matrix @ sparse.diags(idf.astype(np.float32))
+    norms = np.sqrt(np.asarray(matrix.multiply(matrix).sum(axis=1))).ravel()
+    norms[norms == 0] = 1
+    return recipe_ids, (sparse.diags(1 / norms) @ matrix).tocsr()
+
+
+def similarities(matrix, rows, chunk_size):
+    transposed = matrix.T.tocsc()
+    for start in range(0, len(rows), chunk_size):
+        chunk = rows[start:start + chunk_size]
+        products = (matrix[chunk] @ transposed).tocsr()
+        for position, row in enumerate(chunk):
+            begin, end = products.indptr[position:position + 2]
+            columns = products.indices[begin:end]
+            scores = products.data[begin:end]
+            keep = columns != row
+            yield row, columns[keep], scores[keep]
+
+
+def top(columns, scores, k):
+    if len(scores) > k:
+        best = np.argpartition(-scores, k)[:k]
+        columns, scores = columns[best], scores[best]
+    return columns, scores
+
+
+def affected_rows(matrix, recipe_ids, changed_rows, k, chunk_size):
+    stored = {
+        row['recipe']: (row['lowest'], row['total'])
+        for row in RecipeNeighbour.objects.values('recipe').annotate(
+            lowest=models.Min('score'), total=models.Count('id')
+        ).order_by()
+    }
+    thresholds = np.zeros(len(recipe_ids), np.float32)
+    for position, recipe_id in enumerate(recipe_ids.tolist()):
+        lowest, total = stored.get(recipe_id, (0, 0))
+        thresholds[position] = lowest if total >= k else 0
+    affected = set(changed_rows.tolist())
+    for _, columns, scores in similarities(
+            matrix, changed_rows, chunk_size):
+        affected.update(columns[scores > thresholds[columns]].tolist())
+    changed_ids = recipe_ids[changed_rows].tolist()
+    affected.update(np.searchsorted(recipe_ids, list(
+        RecipeNeighbour.objects.filter(neighbour__in=changed_ids)
+        .values_list('recipe', flat=True).distinct().order_by()
+    )).tolist())
+    return np.array(sorted(affected), np.int64)
+
+
+def rebuild_neighbours(full=False, k=NeighbourEnums.TOP_K,
+                       chunk_size=NeighbourEnums.CHUNK_SIZE):
+    started = timezone.now()
+    recipe_ids, matrix = build_matrix()
+    since = RecipeNeighbour.objects.aggregate(
+        since=models.Max('computed'))['since']
+    if full or since is None:
+        rows = np.arange(len(recipe_ids))
+    else:
+        changed = np.searchsorted(recipe_ids, list(
+            Recipe.objects.filter(updated__gte=since).order_by()
+            .values_list('id', flat=True)))
+        rows = affected_rows(matrix, recipe_ids, changed, k, chunk_size)
+    sources, targets, weights = [], [], []
+    for row, columns, scores in similarities(matrix, rows, chunk_size):
+        columns, scores = top(columns, scores, k)
+        sources.append(np.full(len(columns), row))
+        targets.append(columns)
+        weights.append(scores)
+    sources, targets, weights = (
+        np.concatenate(values or [np.empty(0)])
+        for values in (sources, targets, weights))
+    positive = weights > 0
+    sources = recipe_ids[sources[positive].astype(np.int64)].tolist()
+    targets = recipe_ids[targets[positive].astype(np.int64)].tolist()
+    weights = weights[positive].tolist()
+    batch = chunk_size * k
+    with transaction.atomic():
+        stale = RecipeNeighbour.objects.all()
+        if len(rows) < len(recipe_ids):
+            stale = stale.filter(recipe__in=recipe_ids[rows].tolist())
+        stale.delete()
+        for start in range(0, len(weights), batch):
+            RecipeNeighbour.objects.store(
+                sources[start:start + batch], targets[start:start + batch],
+                weights[start:start + batch], started)
+    return len(rows), len(weights)
@@ -0,0 +1,100 @@
+import logging
+
+from django.db.models.signals import (m2m_changed, post_delete, post_save,
+                                      pre_save)
+from django.dispatch import Signal, receiver
+
+from recipes.images import clear_variants, save_variants
+from recipes.models import (AmountIngredient, Recipe, ShoppingCart,
+                            ShoppingListItem)
+
+logger = logging.getLogger(__name__)
+
+ingredients_imported = Signal()
+popularity_updated = Signal()
+user_recipes_changed = Signal()
+
+
+@receiver(post_save, sender=ShoppingCart)
+def add_to_shopping_list(sender, instance, created, **kwargs):
+    ShoppingListItem.objects.refresh(
+        (instance.user_id,),
+        AmountIngredient.objects.filter(
+            recipe_id=instance.recipe_id).values('ingredient'))
+
+
+@receiver(post_delete, sender=ShoppingCart)
+def remove_from_shopping_list(sender, instance, **kwargs):
+    ShoppingListItem.objects.refresh((instance.user_id,))
+
+
+@receiver(user_recipes_changed, sender=ShoppingCart)
+def sync_shopping_list(sender, user_id, recipe_ids, **kwargs):
+    ShoppingListItem.objects.refresh(
+        (user_id,),
+        AmountIngredient.objects.filter(
+            recipe_id__in=recipe_ids).values('ingredient'))
+
+
+@receiver(pre_save, sender=AmountIngredient)
+def remember_ingredient(sender, instance, **kwargs):
+    instance._previous_ingredient_id = (
+        AmountIngredient.objects.filter(pk=instance.pk)
+        .values_list('ingredient_id', flat=True).first()
+        if instance.pk else None)
+
+
+@receiver(post_save, sender=AmountIngredient)
+def update_shopping_lists(sender, instance, **kwargs):
+    ingredient_ids = {instance.ingredient_id,
+                      getattr(instance, '_previous_ingredient_id', None)}
+    ingredient_ids.discard(None)
+    ShoppingListItem.objects.refresh_for_recipe(
+        instance.recipe_id, ingredient_ids)
+
+
+@receiver(post_delete, sender=AmountIngredient)
+def clean_shopping_lists(sender, instance, **kwargs):
+    ShoppingListItem.objects.refresh_for_recipe(
+        instance.recipe_id, (instance.ingredient_id,))
+
+
+@receiver((post_save, post_delete), sender=AmountIngredient)
+def touch_recipe(sender, instance, **kwargs):
+    Recipe.objects.filter(pk=instance.recipe_id).touch()
+
+
+@receiver(m2m_changed, sender=Recipe.tags.through)
+def touch_tagged_recipes(sender, instance, action, reverse, pk_set,
+                         **kwargs):
+    if not reverse and action.startswith('post_'):
+        Recipe.objects.filter(pk=instance.pk).touch()
+    elif reverse and action in ('post_add', 'post_remove'):
+        Recipe.objects.filter(pk__in=pk_set).touch()
+    elif reverse and action == 'pre_clear':
+        instance.recipes.touch()
+
+
+@receiver(pre_save, sender=Recipe)
+def remember_new_image(sender, instance, **kwargs):
+    instance._image_uploaded = bool(
+        instance.image and not instance.image._committed)
+    if instance._image_uploaded and instance.pk:
+        instance._previous_image = (
+            Recipe.objects.filter(pk=instance.pk, thumbnail__gt='')
+            .values_list('image', flat=True).first())
+
+
+@receiver(post_save, sender=Recipe)
+def make_image_variants(sender, instance, **kwargs):
+    if not getattr(instance, '_image_uploaded', False):
+        return
+    instance._image_uploaded = False
+    if instance.image.name == getattr(instance, '_previous_image', None):
+        return
+    try:
+        save_variants(instance)
+    except (OSError, ValueError) as error:
+        logger.warning('Recipe %s: image variants skipped: %s',
+                       instance.pk, error)
+        clear_variants(instance)
@@ -0,0 +1,73 @@
+import os
+import shutil
+import tempfile
+import time
+from io import StringIO
+from unittest import mock
+
+from django.core.files.base import ContentFile
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from recipes.models import Recipe, content_storage
+from users.models import User
+
+HOUR = 60 * 60
+
+
+class GcImagesTest(TestCase):
+    def setUp(self):
+        media_root = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, media_root)
+        media = override_settings(MEDIA_ROOT=media_root)
+        media.enable()
+        self.addCleanup(media.disable)
+        self.author = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password-12345')
+
+    def save_blob(self, content, age=2 * HOUR):
+        name = content_storage.save(
+            'images/photo.png', ContentFile(content))
+        past = time.time() - age
+        os.utime(content_storage.path(name), (past, past))
+        return name
+
+    def make_recipe(self, image):
+        return Recipe.objects.create(
+            name='recipe', author=self.author, image=image,
+            text='text', cooking_time=5)
+
+    def collect(self):
+        call_command('gcimages', stdout=StringIO())
+
+    def test_removes_only_old_orphans(self):
+        orphan = self.save_blob(b'orphan')
+        used = self.save_blob(b'used')
+        fresh = self.save_blob(b'fresh', age=0)
+        self.make_recipe(used)
+        self.collect()
+        self.assertFalse(content_storage.exists(orphan))
+        self.assertTrue(content_storage.exists(used))
+        self.assertTrue(content_storage.exists(fresh))
+
+    def test_reupload_refreshes_orphan(self):
+        name = self.save_blob(b'photo')
+        self.assertEqual(content_storage.save(
+            'images/photo.png', ContentFile(b'photo')), name)
+        self.collect()
+        self.assertTrue(content_storage.exists(name))
+
+    def test_rechecks_references_before_delete(self):
+        name = self.save_blob(b'photo')
+        blobs = content_storage.blobs
+
+        def blobs_after_reference(directory):
+            if not Recipe.objects.exists():
+                self.make_recipe(name)
+            yield from blobs(directory)
+
+        with mock.patch.object(content_storage, 'blobs',
+                               blobs_after_reference):
+            self.collect()
+        self.assertTrue(content_storage.exists(name))
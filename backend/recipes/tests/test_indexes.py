@@ -0,0 +1,62 @@
+from django.db import connection
+from django.test import TestCase
+from django.utils import timezone
+
+from recipes.models import Favorite, Recipe, ShoppingCart, Tag
+from users.models import User
+
+
+class IndexUsageTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(
+            username='author', email='author@example.com',
+            password='password-12345')
+        cls.recipe = Recipe.objects.create(
+            name='recipe', author=cls.user, image='images/recipe.png',
+            text='text', cooking_time=5)
+        Favorite.objects.create(user=cls.user, recipe=cls.recipe)
+        ShoppingCart.objects.create(user=cls.user, recipe=cls.recipe)
+
+    def explain(self, queryset):
+        sql, params = queryset.query.sql_with_params()
+        with connection.cursor() as cursor:
+            cursor.execute('SET LOCAL enable_seqscan = off')
+            cursor.execute(f'EXPLAIN {sql}', params)
+            return '\n'.join(row for row, in cursor.fetchall())
+
+    def assertUsesIndex(self, queryset, index):
+        plan = self.explain(queryset)
+        self.assertIn(index, plan)
+        self.assertNotIn('Seq Scan', plan)
+
+    def test_hot_queries_use_indexes(self):
+        cases = (
+            (Recipe.objects.order_by('name', 'id')[:6],
+             'recipe_name_id_idx'),
+            (Tag.objects.filter(slug='breakfast'), 'recipes_tag_slug'),
+            (Favorite.objects.filter(user=self.user, recipe=self.recipe),
+             'favorite_user_recipe_idx'),
+            (ShoppingCart.objects.filter(user=self.user, recipe=self.recipe),
+             'cart_user_recipe_idx'),
+            (ShoppingCart.objects.filter(user=self.user).values('recipe'),
+             'cart_user_recipe_idx'),
+            (Favorite.objects.filter(created__gte=timezone.now()),
+             'favorite_created_idx'),
+            (ShoppingCart.objects.filter(created__gte=timezone.now()),
+             'cart_created_idx'),
+            (User.objects.order_by('last_name', 'first_name', 'id')[:6],
+             'user_full_name_idx'),
+        )
+        for queryset, index in cases:
+            with self.subTest(index=index):
+                self.assertUsesIndex(queryset, index)
+
+    def test_no_redundant_user_indexes(self):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                'SELECT tablename FROM pg_indexes'
+                ' WHERE tablename = ANY(%s) AND indexdef LIKE %s',
+                ([Favorite._meta.db_table, ShoppingCart._meta.db_table],
+                 '%(user_id)'))
+            self.assertEqual(cursor.fetchall(), [])
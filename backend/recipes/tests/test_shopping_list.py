@@ -0,0 +1,62 @@
+import threading
+import time
+
+from django.db import connection, transaction
+from django.test import TransactionTestCase
+
+from recipes.models import (AmountIngredient, Ingredient, Recipe,
+                            ShoppingCart, ShoppingListItem)
+from users.models import User
+
+
+class ShoppingListRefreshTest(TransactionTestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            username='buyer', email='buyer@example.com',
+            password='password-12345')
+        recipe = Recipe.objects.create(
+            name='recipe', author=self.user, image='images/recipe.png',
+            text='text', cooking_time=5)
+        ingredient = Ingredient.objects.create(
+            name='соль', measurement_unit='г')
+        AmountIngredient.objects.create(
+            recipe=recipe, ingredient=ingredient, amount=10)
+        ShoppingCart.objects.bulk_create(
+            (ShoppingCart(user=self.user, recipe=recipe),))
+        ShoppingListItem.objects.all().delete()
+
+    def run_in_thread(self, target):
+        errors = []
+
+        def run():
+            try:
+                target()
+            except Exception as error:
+                errors.append(error)
+            finally:
+                connection.close()
+
+        thread = threading.Thread(target=run)
+        thread.start()
+        return thread, errors
+
+    def test_concurrent_refreshes_do_not_insert_twice(self):
+        refreshed = threading.Event()
+
+        def first():
+            with transaction.atomic():
+                ShoppingListItem.objects.refresh((self.user.id,))
+                refreshed.set()
+                time.sleep(0.5)
+
+        first_thread, first_errors = self.run_in_thread(first)
+        refreshed.wait()
+        second_thread, second_errors = self.run_in_thread(
+            lambda: ShoppingListItem.objects.refresh((self.user.id,)))
+        first_thread.join()
+        second_thread.join()
+        self.assertEqual(first_errors + second_errors, [])
+        self.assertEqual(
+            list(ShoppingListItem.objects.values_list(
+                'user', 'total_amount')),
+            [(self.user.id, 10)])
@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.test import TestCase
+
+from recipes.models import Ingredient
+
+CSV_PATH = settings.BASE_DIR / 'data' / 'ingredients.csv'
+
+
+class UploadIngredientsTest(TestCase):
+    def upload(self, *args):
+        output = StringIO()
+        call_command('uploadingredients', *args, stdout=output)
+        return output.getvalue().splitlines()[-1]
+
+    def test_counts_inserted_and_skipped_rows(self):
+        total = sum(1 for _ in open(CSV_PATH, encoding='utf-8'))
+        Ingredient.objects.create(name='абрикосовое варенье',
+                                  measurement_unit='г')
+        report = self.upload(str(CSV_PATH), '--batch-size', '500')
+        self.assertEqual(Ingredient.objects.count(), total)
+        self.assertIn(f'Добавлено: {total - 1}, пропущено: 1', report)
+        report = self.upload(str(CSV_PATH))
+        self.assertIn(f'Добавлено: 0, пропущено: {total}', report)
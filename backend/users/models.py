@@ -1,6 +1,6 @@
 from django.contrib.auth.models import AbstractUser
 from django.core import validators
-from django.db import models
+from django.db import connection, models
 
 from users import enums
 
@@ -52,11 +52,37 @@ class User(AbstractUser):
         verbose_name = 'Пользователь'
         verbose_name_plural = 'Пользователи'
         ordering = ('last_name', 'first_name')
+        indexes = (
+            models.Index(fields=('last_name', 'first_name', 'id'),
+                         name='user_full_name_idx'),
+        )
 
     def __str__(self):
         return self.username
 
 
+class SubscriptionQuerySet(models.QuerySet):
+    def subscribe(self, user_id, author_id):
+        users = User._meta.db_table
+        return next(iter(User.objects.raw(
+            'WITH inserted AS ('
+            f' INSERT INTO {self.model._meta.db_table} (user_id, author_id)'
+            f' SELECT %s, id FROM {users} WHERE id = %s'
+            ' ON CONFLICT DO NOTHING RETURNING id'
+            f') SELECT *, EXISTS (SELECT 1 FROM inserted) AS inserted'
+            f' FROM {users} WHERE id = %s',
+            (user_id, author_id, author_id),
+        )), None)
+
+    def unsubscribe(self, user_id, author_id):
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'DELETE FROM {self.model._meta.db_table}'
+                ' WHERE user_id = %s AND author_id = %s RETURNING id',
+                (user_id, author_id))
+            return cursor.fetchone() is not None
+
+
 class Subscription(models.Model):
     user = models.ForeignKey(
         User,
@@ -71,6 +97,8 @@ class Subscription(models.Model):
         verbose_name='Автор',
     )
 
+    objects = SubscriptionQuerySet.as_manager()
+
     class Meta:
         verbose_name = 'Подписка'
         verbose_name_plural = 'Подписки'